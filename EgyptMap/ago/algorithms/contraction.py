@@ -0,0 +1,231 @@
+import hashlib
+import heapq
+import json
+
+
+class ContractionHierarchy:
+    """Contraction Hierarchies over an undirected weighted road graph.
+
+    Built offline from the adjacency dict produced by
+    ShortestPathFinder._prepare_graph. Nodes are contracted in order of
+    importance and shortcuts are added wherever a contracted node lies on
+    the only shortest path between two of its neighbours. Queries run a
+    bidirectional Dijkstra that only ever moves to higher-ranked nodes.
+    """
+
+    def __init__(self, rank=None, up=None, signature=None):
+        self.rank = rank or {}
+        # up[node][higher_node] = (weight, middle); middle is the contracted
+        # node a shortcut bypasses, or None for an original road
+        self.up = up or {}
+        self.signature = signature
+        self.witness_limit = 200  # settled nodes per witness search
+
+    @staticmethod
+    def graph_signature(graph):
+        """Fingerprint of a weighted graph, used to detect stale hierarchies"""
+        digest = hashlib.sha1()
+        for node in sorted(graph):
+            for neighbor in sorted(graph[node]):
+                digest.update(f"{node}|{neighbor}|{graph[node][neighbor]['weight']!r};".encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Contract every node of the graph and return the hierarchy"""
+        ch = cls(signature=cls.graph_signature(graph))
+        ch._contract_all(graph)
+        return ch
+
+    def _contract_all(self, graph):
+        # Working adjacency over not-yet-contracted nodes: node -> {neighbor: (weight, middle)}
+        adj = {node: {} for node in graph}
+        for node, edges in graph.items():
+            for neighbor, edge in edges.items():
+                if neighbor == node:
+                    continue
+                adj.setdefault(neighbor, {})
+                weight = edge['weight']
+                if neighbor not in adj[node] or weight < adj[node][neighbor][0]:
+                    adj[node][neighbor] = (weight, None)
+                    adj[neighbor][node] = (weight, None)
+
+        contracted_neighbors = {node: 0 for node in adj}
+        heap = [(self._priority(node, adj, contracted_neighbors), node) for node in adj]
+        heapq.heapify(heap)
+        order = 0
+
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in self.rank:
+                continue
+
+            # Lazy update: re-evaluate and postpone if no longer the cheapest
+            priority = self._priority(node, adj, contracted_neighbors)
+            if heap and priority > heap[0][0]:
+                heapq.heappush(heap, (priority, node))
+                continue
+
+            for u, w, weight in self._find_shortcuts(node, adj):
+                if w not in adj[u] or weight < adj[u][w][0]:
+                    adj[u][w] = (weight, node)
+                    adj[w][u] = (weight, node)
+
+            self.rank[node] = order
+            order += 1
+            self.up[node] = dict(adj[node])
+            for neighbor in adj[node]:
+                del adj[neighbor][node]
+                contracted_neighbors[neighbor] += 1
+            del adj[node]
+
+    def _priority(self, node, adj, contracted_neighbors):
+        """Edge difference plus contracted-neighbour count"""
+        shortcuts = len(self._find_shortcuts(node, adj))
+        return shortcuts - len(adj[node]) + contracted_neighbors[node]
+
+    def _find_shortcuts(self, node, adj):
+        """Shortcuts needed to preserve distances if node were contracted"""
+        neighbors = list(adj[node].items())
+        shortcuts = []
+        for i, (u, (weight_u, _)) in enumerate(neighbors):
+            targets = {w: weight_u + weight_w for w, (weight_w, _) in neighbors[i + 1:]}
+            if not targets:
+                continue
+            witness = self._witness_search(u, node, targets, max(targets.values()), adj)
+            for w, via_weight in targets.items():
+                if witness.get(w, float('inf')) > via_weight:
+                    shortcuts.append((u, w, via_weight))
+        return shortcuts
+
+    def _witness_search(self, source, excluded, targets, limit, adj):
+        """Bounded Dijkstra from source that avoids the node being contracted"""
+        distances = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        remaining = set(targets)
+
+        while heap and remaining and settled < self.witness_limit:
+            dist, current = heapq.heappop(heap)
+            if dist > distances.get(current, float('inf')):
+                continue
+            if dist > limit:
+                break
+            settled += 1
+            remaining.discard(current)
+
+            for neighbor, (weight, _) in adj[current].items():
+                if neighbor == excluded:
+                    continue
+                new_dist = dist + weight
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(heap, (new_dist, neighbor))
+
+        return distances
+
+    def query(self, start, end):
+        """Return (total_weight, path) between two nodes, or None if unreachable"""
+        if start not in self.rank or end not in self.rank:
+            return None
+        if start == end:
+            return 0, [start]
+
+        dist = ({start: 0}, {end: 0})
+        parent = ({}, {})
+        heaps = ([(0, start)], [(0, end)])
+        best = float('inf')
+        meeting = None
+
+        while heaps[0] or heaps[1]:
+            for side in (0, 1):
+                heap = heaps[side]
+                if not heap:
+                    continue
+                d, current = heapq.heappop(heap)
+                if d > dist[side].get(current, float('inf')):
+                    continue
+                if d >= best:
+                    # Nothing left on this side can improve the best meeting
+                    heap.clear()
+                    continue
+
+                other = dist[1 - side].get(current)
+                if other is not None and d + other < best:
+                    best = d + other
+                    meeting = current
+
+                for neighbor, (weight, _) in self.up.get(current, {}).items():
+                    new_dist = d + weight
+                    if new_dist < dist[side].get(neighbor, float('inf')):
+                        dist[side][neighbor] = new_dist
+                        parent[side][neighbor] = current
+                        heapq.heappush(heap, (new_dist, neighbor))
+
+        if meeting is None:
+            return None
+
+        forward = [meeting]
+        while forward[-1] in parent[0]:
+            forward.append(parent[0][forward[-1]])
+        forward.reverse()
+        backward = [meeting]
+        while backward[-1] in parent[1]:
+            backward.append(parent[1][backward[-1]])
+
+        packed = forward + backward[1:]
+        path = [packed[0]]
+        for i in range(len(packed) - 1):
+            path.extend(self._unpack_edge(packed[i], packed[i + 1])[1:])
+        return best, path
+
+    def _unpack_edge(self, a, b):
+        """Expand a (possibly shortcut) edge into the original nodes it covers"""
+        path = [a]
+        stack = [(a, b)]
+        while stack:
+            u, v = stack.pop()
+            low, high = (u, v) if self.rank[u] < self.rank[v] else (v, u)
+            middle = self.up[low][high][1]
+            if middle is None:
+                path.append(v)
+            else:
+                # Process (u, middle) before (middle, v)
+                stack.append((middle, v))
+                stack.append((u, middle))
+        return path
+
+    def save(self, filename):
+        with open(filename, 'w') as f:
+            json.dump({
+                'signature': self.signature,
+                'rank': self.rank,
+                'up': {
+                    node: [[neighbor, weight, middle] for neighbor, (weight, middle) in edges.items()]
+                    for node, edges in self.up.items()
+                }
+            }, f)
+
+    @classmethod
+    def load(cls, filename):
+        with open(filename) as f:
+            raw = json.load(f)
+        up = {
+            node: {neighbor: (weight, middle) for neighbor, weight, middle in edges}
+            for node, edges in raw['up'].items()
+        }
+        return cls(rank=raw['rank'], up=up, signature=raw['signature'])
+
+
+if __name__ == '__main__':
+    # Offline preprocessing, run from the project root:
+    #   python -m algorithms.contraction [output_directory]
+    import os
+    import sys
+
+    from data.cairo_data import CairoData
+    from algorithms.shortest_path import ShortestPathFinder
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.join('data', 'hierarchies')
+    ShortestPathFinder(CairoData()).build_hierarchies(directory)
+    print(f"Contraction hierarchies saved to {directory}")
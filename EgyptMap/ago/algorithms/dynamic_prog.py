@@ -2,10 +2,20 @@ import math
 from collections import defaultdict
 import heapq
 
+from algorithms.raptor import RaptorPlanner
+
 class PublicTransportOptimizer:
+    # Demand, membership and location lookups shared by every optimizer
+    # instance (a CairoData.cache_entry)
+    _index_cache = None
+    # RAPTOR timetable built from the optimized frequencies, same kind of entry
+    _planner_cache = None
+
     def __init__(self, cairo_data):
         self.data = cairo_data
         self.peak_hours = {'morning': (7, 9), 'evening': (17, 19)}
+        self.service_hours = (5, 24)  # first and last departure hour
+        self.transfer_time = 3  # minutes to change vehicles at a stop
         self.transport_graph = self._build_transport_graph()
     
     def _build_transport_graph(self):
@@ -138,6 +148,95 @@ class PublicTransportOptimizer:
                 }
             }
 
+    def plan_journey(self, origin, destination, departure, max_transfers=3):
+        """Earliest-arrival metro/bus journeys leaving origin at departure.
+
+        departure is in minutes after midnight. Returns the Pareto set of
+        journeys (arrival time against number of transfers), fewest
+        transfers first.
+        """
+        journeys = self._get_journey_planner().query(origin, destination, departure, max_transfers)
+        
+        for journey in journeys:
+            journey['departure_time'] = self._format_clock(journey['departure'])
+            journey['arrival_time'] = self._format_clock(journey['arrival'])
+            for leg in journey['legs']:
+                leg['from_name'] = self._get_location_name(leg['from'])
+                leg['to_name'] = self._get_location_name(leg['to'])
+                leg['towards_name'] = self._get_location_name(leg['towards'])
+                leg['departure_time'] = self._format_clock(leg['departure'])
+                leg['arrival_time'] = self._format_clock(leg['arrival'])
+        
+        return {
+            'origin': str(origin),
+            'destination': str(destination),
+            'origin_name': self._get_location_name(str(origin)),
+            'destination_name': self._get_location_name(str(destination)),
+            'departure_time': self._format_clock(departure),
+            'journeys': journeys
+        }
+    
+    def _get_journey_planner(self):
+        """Return the cached RAPTOR planner for the current schedules"""
+        cached = self.data.cached(self._planner_cache)
+        if cached is not None:
+            return cached
+        
+        lines = {line['id']: line for line in self.data.metro_lines}
+        routes = {route['id']: route for route in self.data.bus_routes}
+        
+        timetable = []
+        for result in self._optimize_metro_schedules():
+            line = lines[result['line_id']]
+            segment_times = [
+                self._calculate_metro_segment_time(line, i) for i in range(len(line['stations'])-1)
+            ]
+            timetable.extend(self._timetable_routes(result['line_id'], 'metro', line['stations'], segment_times, result))
+        
+        for result in self._optimize_bus_schedules():
+            route = routes[result['route_id']]
+            segment_times = [
+                self._calculate_bus_segment_time(route, i) for i in range(len(route['stops'])-1)
+            ]
+            timetable.extend(self._timetable_routes(result['route_id'], 'bus', route['stops'], segment_times, result))
+        
+        planner = RaptorPlanner(timetable, self.transfer_time)
+        PublicTransportOptimizer._planner_cache = self.data.cache_entry(planner)
+        return planner
+    
+    def _timetable_routes(self, route_id, mode, stops, segment_times, schedule):
+        """Both directions of a line, with departures at its optimized headways"""
+        # Split the service day at the peak boundaries; each period runs at
+        # its own headway (frequencies are vehicles per hour)
+        first, last = self.service_hours
+        boundaries = {first, last}
+        for start, end in self.peak_hours.values():
+            boundaries.update(hour for hour in (start, end) if first < hour < last)
+        boundaries = sorted(boundaries)
+        
+        departures = []
+        for start, end in zip(boundaries, boundaries[1:]):
+            peak = any(p_start <= start < p_end for p_start, p_end in self.peak_hours.values())
+            headway = 60 / (schedule['peak_frequency'] if peak else schedule['base_frequency'])
+            # Whole minutes from the start of the period, as a printed timetable would show
+            k = 0
+            while start * 60 + k * headway < end * 60:
+                departures.append(round(start * 60 + k * headway))
+                k += 1
+        departures = sorted(set(departures))
+        
+        return [
+            {'id': route_id, 'mode': mode, 'stops': stops,
+             'segment_times': segment_times, 'departures': departures},
+            {'id': route_id, 'mode': mode, 'stops': stops[::-1],
+             'segment_times': segment_times[::-1], 'departures': departures}
+        ]
+    
+    @staticmethod
+    def _format_clock(minutes):
+        minutes = int(round(minutes))
+        return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
     def _calculate_real_improvements(self, metro_results, bus_results):
         """Calculate actual improvements based on before/after comparison"""
     # Metro improvements - calculate capacity increase percentage
@@ -202,72 +301,68 @@ class PublicTransportOptimizer:
 
     def _optimize_metro_schedules(self):
         """Optimize metro schedules with realistic parameters"""
-        results = []
+        return [self._optimize_metro_line(line) for line in self.data.metro_lines]
+
+    def _optimize_metro_line(self, line):
+        """Frequency and fleet size for one metro line"""
+        stations = line['stations']
+        n = len(stations)
+        
+        # Calculate segment demands based on actual data
+        segment_demands = []
+        for i in range(n-1):
+            from_id = stations[i]
+            to_id = stations[i+1]
+            demand = self._calculate_segment_demand(from_id, to_id)
+            segment_demands.append(demand)
+        
+        # Determine frequency for each segment
+        segment_frequencies = [
+            max(4, min(20, math.ceil(demand / (1200 * 0.8))))  # 1200 passengers/train, 80% load factor
+            for demand in segment_demands
+        ]
         
-        for line in self.data.metro_lines:
-            stations = line['stations']
-            n = len(stations)
-            
-            # Calculate segment demands based on actual data
-            segment_demands = []
-            for i in range(n-1):
-                from_id = stations[i]
-                to_id = stations[i+1]
-                demand = self._calculate_segment_demand(from_id, to_id)
-                segment_demands.append(demand)
-            
-            # Determine frequency for each segment
-            segment_frequencies = [
-                max(4, min(20, math.ceil(demand / (1200 * 0.8))))  # 1200 passengers/train, 80% load factor
-                for demand in segment_demands
-            ]
-            
-            # Line frequency is maximum segment frequency
-            base_freq = max(segment_frequencies) if segment_frequencies else 6
-            peak_freq = base_freq * 1.5
-            
-            # Calculate required trains
-            avg_speed = 30  # km/h
-            round_trip_time = (2 * line['distance'] / avg_speed) * 60  # minutes
-            trains_needed = math.ceil(peak_freq * round_trip_time / 60)
-            
-            # Get station data
-            station_data = []
-            for station_id in line['stations']:
-                loc = self._get_location_data(str(station_id))
-                if loc:
-                    station_data.append({
-                        'id': str(station_id),
-                        'name': loc['name'],
-                        'x': loc['x'],
-                        'y': loc['y']
-                    })
-            
-            results.append({
-                'line_id': line['id'],
-                'name': line['name'],
-                'stations': station_data,
-                'station_ids': [str(s) for s in line['stations']],
-                'base_frequency': base_freq,
-                'peak_frequency': peak_freq,
-                'trains_needed': trains_needed,
-                'coverage': self._calculate_coverage(line['stations']),
-                'demand': line.get('passengers', sum(segment_demands)),
-                'distance': line.get('distance', 15)
-            })
+        # Line frequency is maximum segment frequency
+        base_freq = max(segment_frequencies) if segment_frequencies else 6
+        peak_freq = base_freq * 1.5
+        
+        # Calculate required trains
+        avg_speed = 30  # km/h
+        round_trip_time = (2 * line['distance'] / avg_speed) * 60  # minutes
+        trains_needed = math.ceil(peak_freq * round_trip_time / 60)
+        
+        # Get station data
+        station_data = []
+        for station_id in line['stations']:
+            loc = self._get_location_data(str(station_id))
+            if loc:
+                station_data.append({
+                    'id': str(station_id),
+                    'name': loc['name'],
+                    'x': loc['x'],
+                    'y': loc['y']
+                })
         
-        return results
+        return {
+            'line_id': line['id'],
+            'name': line['name'],
+            'stations': station_data,
+            'station_ids': [str(s) for s in line['stations']],
+            'base_frequency': base_freq,
+            'peak_frequency': peak_freq,
+            'trains_needed': trains_needed,
+            'coverage': self._calculate_coverage(line['stations']),
+            'demand': line.get('passengers', sum(segment_demands)),
+            'distance': line.get('distance', 15)
+        }
 
     def _calculate_segment_demand(self, from_id, to_id):
         """Calculate realistic demand between two stations"""
         from_str = str(from_id)
         to_str = str(to_id)
         
-        # Base demand from transport data
-        direct = next((d.get('passengers', 0) for d in self.data.transport_demand 
-                      if str(d.get('from')) == from_str and str(d.get('to')) == to_str), 0)
-        reverse = next((d.get('passengers', 0) for d in self.data.transport_demand 
-                       if str(d.get('from')) == to_str and str(d.get('to')) == from_str), 0)
+        # Base demand from transport data, both directions combined
+        demand = self._get_indexes()['demand'].get(self.data.pair_key(from_str, to_str), 0)
         
         # Add contributions from connecting transit
         transit_factor = 1.0
@@ -276,85 +371,78 @@ class PublicTransportOptimizer:
         if self._is_bus_stop(from_str) or self._is_bus_stop(to_str):
             transit_factor += 0.15
         
-        return (direct + reverse) * transit_factor
+        return demand * transit_factor
 
     def _is_metro_station(self, location_id):
         """Check if location is a metro station"""
-        for line in self.data.metro_lines:
-            if location_id in [str(s) for s in line.get('stations', [])]:
-                return True
-        return False
+        return location_id in self._get_indexes()['metro_stations']
 
     def _is_bus_stop(self, location_id):
         """Check if location is a bus stop"""
-        for route in self.data.bus_routes:
-            if location_id in [str(s) for s in route.get('stops', [])]:
-                return True
-        return False
+        return location_id in self._get_indexes()['bus_stops']
 
     def _optimize_bus_schedules(self):
         """Optimize bus schedules with realistic parameters"""
-        results = []
+        return [self._optimize_bus_route(route) for route in self.data.bus_routes]
+
+    def _optimize_bus_route(self, route):
+        """Frequency and fleet size for one bus route"""
+        stops = route['stops']
+        n = len(stops)
+        
+        # Calculate segment demands based on actual data
+        segment_demands = []
+        for i in range(n-1):
+            from_id = stops[i]
+            to_id = stops[i+1]
+            demand = self._calculate_segment_demand(from_id, to_id)
+            segment_demands.append(demand)
+        
+        # Determine frequency for each segment
+        segment_frequencies = [
+            max(2, min(30, math.ceil(demand / (60 * 0.85))))  # 60 passengers/bus, 85% load factor
+            for demand in segment_demands
+        ]
         
-        for route in self.data.bus_routes:
-            stops = route['stops']
-            n = len(stops)
-            
-            # Calculate segment demands based on actual data
-            segment_demands = []
-            for i in range(n-1):
-                from_id = stops[i]
-                to_id = stops[i+1]
-                demand = self._calculate_segment_demand(from_id, to_id)
-                segment_demands.append(demand)
-            
-            # Determine frequency for each segment
-            segment_frequencies = [
-                max(2, min(30, math.ceil(demand / (60 * 0.85))))  # 60 passengers/bus, 85% load factor
-                for demand in segment_demands
-            ]
-            
-            # Route frequency is maximum segment frequency
-            base_freq = max(segment_frequencies) if segment_frequencies else 4
-            peak_freq = base_freq * 1.8
-            
-            # Calculate required buses
-            avg_speed = 20  # km/h
-            avg_distance = 10  # km
-            round_trip_time = (2 * avg_distance / avg_speed) * 60  # minutes
-            buses_needed = math.ceil(peak_freq * round_trip_time / 60)
-            
-            # Calculate utilization
-            capacity = buses_needed * 60 * 18  # 60 passengers/bus * 18 hours
-            passengers = max(route.get('passengers', 0), sum(segment_demands))
-            utilization = passengers / capacity if capacity > 0 else 1.0
-            
-            # Get stop data
-            stop_data = []
-            for stop_id in route['stops']:
-                loc = self._get_location_data(str(stop_id))
-                if loc:
-                    stop_data.append({
-                        'id': str(stop_id),
-                        'name': loc['name'],
-                        'x': loc['x'],
-                        'y': loc['y']
-                    })
-            
-            results.append({
-                'route_id': route['id'],
-                'stops': stop_data,
-                'stop_ids': [str(s) for s in route['stops']],
-                'base_frequency': base_freq,
-                'peak_frequency': peak_freq,
-                'buses_needed': buses_needed,
-                'current_buses': route.get('buses', 0),
-                'utilization': utilization,
-                'coverage': self._calculate_coverage(route['stops']),
-                'demand': passengers
-            })
+        # Route frequency is maximum segment frequency
+        base_freq = max(segment_frequencies) if segment_frequencies else 4
+        peak_freq = base_freq * 1.8
         
-        return results
+        # Calculate required buses
+        avg_speed = 20  # km/h
+        avg_distance = 10  # km
+        round_trip_time = (2 * avg_distance / avg_speed) * 60  # minutes
+        buses_needed = math.ceil(peak_freq * round_trip_time / 60)
+        
+        # Calculate utilization
+        capacity = buses_needed * 60 * 18  # 60 passengers/bus * 18 hours
+        passengers = max(route.get('passengers', 0), sum(segment_demands))
+        utilization = passengers / capacity if capacity > 0 else 1.0
+        
+        # Get stop data
+        stop_data = []
+        for stop_id in route['stops']:
+            loc = self._get_location_data(str(stop_id))
+            if loc:
+                stop_data.append({
+                    'id': str(stop_id),
+                    'name': loc['name'],
+                    'x': loc['x'],
+                    'y': loc['y']
+                })
+        
+        return {
+            'route_id': route['id'],
+            'stops': stop_data,
+            'stop_ids': [str(s) for s in route['stops']],
+            'base_frequency': base_freq,
+            'peak_frequency': peak_freq,
+            'buses_needed': buses_needed,
+            'current_buses': route.get('buses', 0),
+            'utilization': utilization,
+            'coverage': self._calculate_coverage(route['stops']),
+            'demand': passengers
+        }
 
     def _optimize_transfers(self, metro_results, bus_results):
         """Optimize transfer points between metro and bus"""
@@ -467,86 +555,85 @@ class PublicTransportOptimizer:
 
     def _create_integrated_network(self, metro_results, bus_results):
         """Create integrated network representation"""
-        network = {
-            'nodes': [],
-            'edges': [],
-            'transfer_points': []
-        }
+        locations = self._get_indexes()['locations']
+        nodes = {}  # station/stop ID -> node, in insertion order
+        edges = []
+        transfer_points = []
         
         # Add metro nodes and edges
         for line in metro_results:
             for station_id in line['station_ids']:
-                if not any(n['id'] == station_id for n in network['nodes']):
-                    loc = self._get_location_data(station_id)
+                if station_id not in nodes:
+                    loc = locations.get(station_id)
                     if loc:
-                        network['nodes'].append({
+                        nodes[station_id] = {
                             'id': station_id,
                             'name': loc['name'],
                             'type': 'metro',
                             'x': loc['x'],
                             'y': loc['y'],
                             'lines': [line['line_id']]
-                        })
+                        }
             
             # Add metro edges
-            stations = line['station_ids']
-            for i in range(len(stations)-1):
-                from_loc = self._get_location_data(stations[i])
-                to_loc = self._get_location_data(stations[i+1])
-                if from_loc and to_loc:
-                    network['edges'].append({
-                        'from': stations[i],
-                        'to': stations[i+1],
-                        'from_coords': [from_loc['y'], from_loc['x']],
-                        'to_coords': [to_loc['y'], to_loc['x']],
-                        'type': 'metro',
-                        'line': line['line_id'],
-                        'frequency': line['base_frequency'],
-                        'peak_frequency': line['peak_frequency']
-                    })
+            edges.extend(self._network_edges(line['station_ids'], locations, {
+                'type': 'metro',
+                'line': line['line_id'],
+                'frequency': line['base_frequency'],
+                'peak_frequency': line['peak_frequency']
+            }))
         
         # Add bus nodes and edges
         for route in bus_results:
             for stop_id in route['stop_ids']:
-                existing_node = next((n for n in network['nodes'] if n['id'] == stop_id), None)
+                existing_node = nodes.get(stop_id)
                 if existing_node:
-                    if 'routes' not in existing_node:
-                        existing_node['routes'] = []
-                    existing_node['routes'].append(route['route_id'])
+                    existing_node.setdefault('routes', []).append(route['route_id'])
                     if existing_node['type'] == 'metro':
+                        # A node only turns into a transfer point once
                         existing_node['type'] = 'transfer'
-                        if stop_id not in network['transfer_points']:
-                            network['transfer_points'].append(stop_id)
+                        transfer_points.append(stop_id)
                 else:
-                    loc = self._get_location_data(stop_id)
+                    loc = locations.get(stop_id)
                     if loc:
-                        network['nodes'].append({
+                        nodes[stop_id] = {
                             'id': stop_id,
                             'name': loc['name'],
                             'type': 'bus',
                             'x': loc['x'],
                             'y': loc['y'],
                             'routes': [route['route_id']]
-                        })
+                        }
             
             # Add bus edges
-            stops = route['stop_ids']
-            for i in range(len(stops)-1):
-                from_loc = self._get_location_data(stops[i])
-                to_loc = self._get_location_data(stops[i+1])
-                if from_loc and to_loc:
-                    network['edges'].append({
-                        'from': stops[i],
-                        'to': stops[i+1],
-                        'from_coords': [from_loc['y'], from_loc['x']],
-                        'to_coords': [to_loc['y'], to_loc['x']],
-                        'type': 'bus',
-                        'route': route['route_id'],
-                        'frequency': route['base_frequency'],
-                        'peak_frequency': route['peak_frequency']
-                    })
+            edges.extend(self._network_edges(route['stop_ids'], locations, {
+                'type': 'bus',
+                'route': route['route_id'],
+                'frequency': route['base_frequency'],
+                'peak_frequency': route['peak_frequency']
+            }))
         
-        return network
+        return {
+            'nodes': list(nodes.values()),
+            'edges': edges,
+            'transfer_points': transfer_points
+        }
+
+    def _network_edges(self, stop_ids, locations, attributes):
+        """Edges between consecutive stops that have known coordinates"""
+        edges = []
+        for i in range(len(stop_ids)-1):
+            from_loc = locations.get(stop_ids[i])
+            to_loc = locations.get(stop_ids[i+1])
+            if from_loc and to_loc:
+                edges.append({
+                    'from': stop_ids[i],
+                    'to': stop_ids[i+1],
+                    'from_coords': [from_loc['y'], from_loc['x']],
+                    'to_coords': [to_loc['y'], to_loc['x']],
+                    **attributes
+                })
+        return edges
 
     def _calculate_system_coverage(self, metro_results, bus_results):
         """Calculate coverage metrics for the entire system"""
@@ -603,26 +690,24 @@ class PublicTransportOptimizer:
         num_pairs = 0
         total_time = 0
         
-        # Calculate shortest paths between all pairs of major locations
+        # One search per origin fills the whole matrix; pairs are read off
+        # its upper triangle in the same order as before
+        matrix = self._travel_time_matrix(major_locations)
         for i in range(len(major_locations)):
             for j in range(i+1, len(major_locations)):
-                start = major_locations[i]
-                end = major_locations[j]
-                
-                try:
-                    path_time = self._find_shortest_path_time(start, end)
-                    if path_time:
-                        travel_times.append({
-                            'from': start,
-                            'to': end,
-                            'time': path_time,
-                            'from_name': self._get_location_name(start),
-                            'to_name': self._get_location_name(end)
-                        })
-                        total_time += path_time
-                        num_pairs += 1
-                except Exception:
-                    continue
+                path_time = matrix[i][j]
+                if path_time:
+                    start = major_locations[i]
+                    end = major_locations[j]
+                    travel_times.append({
+                        'from': start,
+                        'to': end,
+                        'time': path_time,
+                        'from_name': self._get_location_name(start),
+                        'to_name': self._get_location_name(end)
+                    })
+                    total_time += path_time
+                    num_pairs += 1
         
         average_time = total_time / num_pairs if num_pairs > 0 else 0
         
@@ -632,34 +717,39 @@ class PublicTransportOptimizer:
             'num_pairs': num_pairs
         }
     
-    def _find_shortest_path_time(self, start, end):
-        """Find shortest path time using Dijkstra's algorithm"""
-        if start not in self.transport_graph or end not in self.transport_graph:
-            return None
-        
-        heap = [(0, start)]
-        visited = set()
-        distances = {node: float('inf') for node in self.transport_graph}
-        distances[start] = 0
-        
-        while heap:
-            current_dist, current_node = heapq.heappop(heap)
+    def _travel_time_matrix(self, locations):
+        """Transit minutes between every pair of locations (None if unreachable)"""
+        index = {loc: i for i, loc in enumerate(locations)}
+        matrix = [[None] * len(locations) for _ in locations]
+        
+        for i, start in enumerate(locations):
+            if start not in self.transport_graph:
+                continue
             
-            if current_node == end:
-                return current_dist
+            # Dijkstra from start that stops once every location is settled
+            remaining = set(index) - {start}
+            matrix[i][i] = 0
+            heap = [(0, start)]
+            distances = {start: 0}
+            visited = set()
             
-            if current_node in visited:
-                continue
+            while heap and remaining:
+                current_dist, current_node = heapq.heappop(heap)
+                if current_node in visited:
+                    continue
+                visited.add(current_node)
                 
-            visited.add(current_node)
-            
-            for neighbor, edge in self.transport_graph[current_node].items():
-                distance = current_dist + edge['time']
-                if distance < distances[neighbor]:
-                    distances[neighbor] = distance
-                    heapq.heappush(heap, (distance, neighbor))
+                if current_node in remaining:
+                    matrix[i][index[current_node]] = current_dist
+                    remaining.discard(current_node)
+                
+                for neighbor, edge in self.transport_graph[current_node].items():
+                    distance = current_dist + edge['time']
+                    if distance < distances.get(neighbor, float('inf')):
+                        distances[neighbor] = distance
+                        heapq.heappush(heap, (distance, neighbor))
         
-        return distances.get(end, None)
+        return matrix
     
     def _haversine_distance(self, coord1, coord2):
         """Calculate distance between two coordinates in km"""
@@ -746,27 +836,41 @@ class PublicTransportOptimizer:
 
     def _get_location_data(self, location_id):
         """Get location data by ID"""
-        # Check neighborhoods
-        neighborhood = next((n for n in self.data.neighborhoods if str(n['id']) == location_id), None)
-        if neighborhood:
-            return {
-                'id': str(neighborhood['id']),
-                'name': neighborhood['name'],
-                'x': neighborhood['x'],
-                'y': neighborhood['y']
-            }
-        
-        # Check facilities
-        facility = next((f for f in self.data.facilities if f['id'] == location_id), None)
-        if facility:
-            return {
-                'id': facility['id'],
-                'name': facility['name'],
-                'x': facility['x'],
-                'y': facility['y']
-            }
-        
-        return None
+        return self._get_indexes()['locations'].get(location_id)
+
+    def _get_indexes(self):
+        """Return the cached demand, membership and location lookups"""
+        cached = self.data.cached(self._index_cache)
+        if cached is not None:
+            return cached
+        
+        # Passengers between an unordered pair of locations: the first
+        # record in each direction, as the old per-segment scans found them
+        directed = {}
+        for d in self.data.transport_demand:
+            directed.setdefault((str(d.get('from')), str(d.get('to'))), d.get('passengers', 0))
+        demand = defaultdict(int)
+        for (from_id, to_id), passengers in directed.items():
+            demand[self.data.pair_key(from_id, to_id)] += passengers
+        
+        metro_stations = {str(s) for line in self.data.metro_lines for s in line.get('stations', [])}
+        bus_stops = {str(s) for route in self.data.bus_routes for s in route.get('stops', [])}
+        
+        # First match wins, and neighborhoods take precedence over facilities
+        locations = {}
+        for f in reversed(self.data.facilities):
+            locations[f['id']] = {'id': f['id'], 'name': f['name'], 'x': f['x'], 'y': f['y']}
+        for n in reversed(self.data.neighborhoods):
+            locations[str(n['id'])] = {'id': str(n['id']), 'name': n['name'], 'x': n['x'], 'y': n['y']}
+        
+        indexes = {
+            'demand': dict(demand),
+            'metro_stations': metro_stations,
+            'bus_stops': bus_stops,
+            'locations': locations
+        }
+        PublicTransportOptimizer._index_cache = self.data.cache_entry(indexes)
+        return indexes
 
     def _calculate_coverage(self, locations):
         """Calculate coverage score for locations"""
@@ -818,4 +922,4 @@ class PublicTransportOptimizer:
             'M1': 22,
             'M2': 18,
             'M3': 16
-        }.get(line_id, 10)
\ No newline at end of file
+        }.get(line_id, 10)
@@ -1,5 +1,12 @@
+from collections import deque
+
+import numpy as np
 
 class TrafficSignalOptimizer:
+    # Intersection -> incident roads index shared by every optimizer instance
+    # (a CairoData.cache_entry)
+    _incidence_cache = None
+
     def __init__(self, cairo_data):
         self.data = cairo_data
         self.time_of_day_factors = {
@@ -8,6 +15,10 @@ class TrafficSignalOptimizer:
             'evening': {'green_extension': 1.4, 'cycle_time': 150},
             'night': {'green_extension': 0.8, 'cycle_time': 60}
         }
+        self.min_green = 15  # seconds
+        # Preemption window around the emergency vehicle's estimated arrival
+        self.preemption_lead = 30  # seconds before arrival
+        self.preemption_clearance = 10  # seconds after arrival
     
     def optimize_signals(self, intersections, time_of_day='morning'):
         time_params = self.time_of_day_factors.get(time_of_day, self.time_of_day_factors['morning'])
@@ -16,94 +27,187 @@ class TrafficSignalOptimizer:
         if not intersections:
             intersections = self._identify_major_intersections()
         
+        incidence = self._get_incidence()
+        
         for intersection in intersections:
-            connected_roads = [
-                r for r in self.data.existing_roads 
-                if r['from'] == intersection or r['to'] == intersection
-            ]
+            connected_roads = incidence.get(intersection, [])
             
             if not connected_roads:
                 continue
             
-            approaches = []
-            for road in connected_roads:
-                other_end = road['to'] if road['from'] == intersection else road['from']
-                traffic = self.data.get_road_traffic(intersection, other_end, time_of_day)
-                capacity = road['capacity']
-                congestion = traffic / capacity
-                
-                approaches.append({
-                    'from': other_end,
-                    'name': self.data.get_location_name(other_end),
-                    'traffic': traffic,
-                    'congestion': congestion,
-                    'priority': 1  # Base priority
-                })
-            
-            # Assign priorities based on traffic and road importance
-            for approach in approaches:
-                # Higher priority for more congested approaches
-                approach['priority'] += approach['congestion'] * 2
-                
-                # Check if road leads to critical facility
-                other_end = approach['from']
-                loc = self.data.get_neighborhood(other_end) or self.data.get_facility(other_end)
-                if loc:
-                    if loc.get('type') in ['Medical', 'Airport', 'Government']:
-                        approach['priority'] += 3
-                    elif loc.get('type') in ['Education', 'Commercial']:
-                        approach['priority'] += 1
+            optimized_signals.append(
+                self._signal_plan(intersection, connected_roads, time_of_day, time_params)
+            )
+        
+        return optimized_signals
+    
+    def _signal_plan(self, intersection, connected_roads, time_of_day, time_params):
+        """Greedy green-time split for one intersection"""
+        approaches = []
+        for road in connected_roads:
+            other_end = road['to'] if road['from'] == intersection else road['from']
+            traffic = self.data.get_road_traffic(intersection, other_end, time_of_day)
+            capacity = road['capacity']
+            congestion = traffic / capacity
             
-            # Sort by priority (greedy choice)
-            approaches.sort(key=lambda x: -x['priority'])
+            approaches.append({
+                'from': other_end,
+                'name': self.data.get_location_name(other_end),
+                'traffic': traffic,
+                'congestion': congestion,
+                'priority': 1  # Base priority
+            })
+        
+        # Assign priorities based on traffic and road importance
+        for approach in approaches:
+            # Higher priority for more congested approaches
+            approach['priority'] += approach['congestion'] * 2
             
-            # Calculate green time allocation
-            cycle_time = time_params['cycle_time']
-            min_green = 15  # seconds
-            total_priority = sum(a['priority'] for a in approaches)
+            # Check if road leads to critical facility
+            approach['priority'] += self._destination_priority(approach['from'])
+        
+        # Sort by priority (greedy choice)
+        approaches.sort(key=lambda x: -x['priority'])
+        
+        # Calculate green time allocation
+        cycle_time = time_params['cycle_time']
+        min_green = self.min_green
+        total_priority = sum(a['priority'] for a in approaches)
+        
+        signal_phases = []
+        remaining_time = cycle_time - (min_green * len(approaches))
+        
+        for approach in approaches:
+            if total_priority > 0:
+                extra_time = (approach['priority'] / total_priority) * remaining_time
+            else:
+                extra_time = 0
             
-            signal_phases = []
-            remaining_time = cycle_time - (min_green * len(approaches))
+            green_time = min_green + extra_time
             
-            for approach in approaches:
-                if total_priority > 0:
-                    extra_time = (approach['priority'] / total_priority) * remaining_time
-                else:
-                    extra_time = 0
-                
-                green_time = min_green + extra_time
-                
-                # Apply time-of-day extension
-                green_time *= time_params['green_extension']
-                
-                signal_phases.append({
-                    'approach': approach['from'],
-                    'approach_name': approach['name'],
-                    'green_time': green_time,
-                    'priority': approach['priority'],
-                    'congestion': approach['congestion']
-                })
+            # Apply time-of-day extension
+            green_time *= time_params['green_extension']
             
-            optimized_signals.append({
-                'intersection': intersection,
-                'intersection_name': self.data.get_location_name(intersection),
-                'approaches': len(connected_roads),
-                'signal_phases': signal_phases,
-                'cycle_time': cycle_time,
-                'time_of_day': time_of_day
+            signal_phases.append({
+                'approach': approach['from'],
+                'approach_name': approach['name'],
+                'green_time': green_time,
+                'priority': approach['priority'],
+                'congestion': approach['congestion']
             })
         
-        return optimized_signals
+        return {
+            'intersection': intersection,
+            'intersection_name': self.data.get_location_name(intersection),
+            'approaches': len(connected_roads),
+            'signal_phases': signal_phases,
+            'cycle_time': cycle_time,
+            'time_of_day': time_of_day
+        }
+    
+    def optimize_signals_batch(self, intersections=None, time_of_day='morning'):
+        """Time every intersection at once and return the plan as columns.
+
+        Uses the same greedy green split as optimize_signals, but over flat
+        per-approach arrays instead of one dict per phase. Intersections
+        default to every road endpoint in the city. Approaches are grouped
+        by intersection (approach_offsets[i]:approach_offsets[i + 1]) and
+        sorted by descending priority within each group.
+        """
+        time_params = self.time_of_day_factors.get(time_of_day, self.time_of_day_factors['morning'])
+        cycle_time = time_params['cycle_time']
+        incidence = self._get_incidence()
+        
+        if not intersections:
+            intersections = list(incidence)
+        
+        timed = []
+        group, approach, traffic, capacity, bonus = [], [], [], [], []
+        for intersection in intersections:
+            roads = incidence.get(intersection)
+            if not roads:
+                continue
+            
+            for road in roads:
+                other_end = road['to'] if road['from'] == intersection else road['from']
+                group.append(len(timed))
+                approach.append(other_end)
+                traffic.append(self.data.get_road_traffic(intersection, other_end, time_of_day))
+                capacity.append(road['capacity'])
+                bonus.append(self._destination_priority(other_end))
+            timed.append(intersection)
+        
+        group = np.array(group, dtype=int)
+        congestion = np.array(traffic, dtype=float) / np.array(capacity, dtype=float)
+        priority = 1 + congestion * 2 + np.array(bonus, dtype=float)
+        
+        # Per-intersection sums, spread back over each intersection's approaches
+        counts = np.bincount(group, minlength=len(timed))
+        total_priority = np.bincount(group, weights=priority, minlength=len(timed))[group]
+        remaining_time = cycle_time - self.min_green * counts[group]
+        extra_time = np.divide(priority * remaining_time, total_priority,
+                               out=np.zeros_like(priority), where=total_priority > 0)
+        green_time = (self.min_green + extra_time) * time_params['green_extension']
+        
+        # lexsort is stable, so ties keep road order as in optimize_signals
+        order = np.lexsort((-priority, group))
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        
+        approaches = [approach[i] for i in order.tolist()]
+        return {
+            'time_of_day': time_of_day,
+            'cycle_time': cycle_time,
+            'intersections': timed,
+            'intersection_names': [self.data.get_location_name(i) for i in timed],
+            'approach_offsets': offsets.tolist(),
+            'approach': approaches,
+            'approach_name': [self.data.get_location_name(a) for a in approaches],
+            'green_time': green_time[order].tolist(),
+            'priority': priority[order].tolist(),
+            'congestion': congestion[order].tolist()
+        }
     
-    # ... (keep the rest of the methods the same as before)
+    def _destination_priority(self, location_id):
+        """Extra signal priority for approaches leading to key facilities"""
+        loc = self.data.get_location(location_id)
+        if loc:
+            if loc.get('type') in ['Medical', 'Airport', 'Government']:
+                return 3
+            elif loc.get('type') in ['Education', 'Commercial']:
+                return 1
+        return 0
     
-    def _identify_major_intersections(self):
-        # Identify intersections with highest traffic (greedy approach)
-        intersection_counts = {}
+    def _get_incidence(self):
+        """Return the cached intersection -> incident roads index"""
+        return self._get_road_tables()[0]
+    
+    def _get_degrees(self):
+        """Return the cached number of roads meeting at every intersection"""
+        return self._get_road_tables()[1]
+    
+    def _get_road_tables(self):
+        cached = self.data.cached(self._incidence_cache)
+        if cached is not None:
+            return cached
         
+        # Keyed by the raw road endpoint IDs, in first-seen order
+        incidence = {}
         for road in self.data.existing_roads:
-            intersection_counts[road['from']] = intersection_counts.get(road['from'], 0) + 1
-            intersection_counts[road['to']] = intersection_counts.get(road['to'], 0) + 1
+            incidence.setdefault(road['from'], []).append(road)
+            if road['to'] != road['from']:
+                incidence.setdefault(road['to'], []).append(road)
+        
+        degrees = {node: len(roads) for node, roads in incidence.items()}
+        # Route IDs from ShortestPathFinder are strings; map them back
+        node_ids = {str(node): node for node in incidence}
+        
+        tables = (incidence, degrees, node_ids)
+        TrafficSignalOptimizer._incidence_cache = self.data.cache_entry(tables)
+        return tables
+    
+    def _identify_major_intersections(self):
+        # Identify intersections with highest traffic (greedy approach)
+        intersection_counts = self._get_degrees()
         
         # Get top 10 intersections with most connections
         sorted_intersections = sorted(intersection_counts.items(), key=lambda x: -x[1])
@@ -137,31 +241,12 @@ class TrafficSignalOptimizer:
                 coming_from = current if i > 0 else None
                 if i == 0:
                     # First segment, find which approach leads to the starting point
-                    roads = [r for r in self.data.existing_roads 
-                            if (r['from'] == intersection and r['to'] == current) or 
-                               (r['to'] == intersection and r['from'] == current)]
-                    if roads:
+                    roads = self._get_incidence().get(intersection, [])
+                    if any(current in (r['from'], r['to']) for r in roads):
                         coming_from = current
                 
                 # Modify the signal plan to prioritize this approach
-                modified_phases = []
-                found_approach = False
-                
-                for phase in current_plan['signal_phases']:
-                    if phase['approach'] == coming_from:
-                        # Give this approach maximum green time
-                        modified_phases.append({
-                            **phase,
-                            'green_time': current_plan['cycle_time'] * 0.7,  # 70% of cycle
-                            'emergency_priority': True
-                        })
-                        found_approach = True
-                    else:
-                        # Reduce other phases
-                        modified_phases.append({
-                            **phase,
-                            'green_time': phase['green_time'] * 0.3  # Reduce to 30%
-                        })
+                modified_phases, found_approach = self._preempt_phases(current_plan, coming_from)
                 
                 if found_approach:
                     preemption_plan.append({
@@ -179,12 +264,98 @@ class TrafficSignalOptimizer:
         
         return preemption_plan
     
+    def plan_corridor_preemption(self, route, time_of_day='morning'):
+        """Preemption plan for every signal along an emergency route.
+
+        Takes the result of ShortestPathFinder.emergency_route (or
+        nearest_facility) and walks its path once: each intermediate stop
+        where more than two roads meet is retimed in favour of the approach
+        the vehicle arrives from, and the cumulative step times give the
+        arrival estimate used to schedule the preemption window.
+        """
+        path = route.get('path') if route else None
+        if not path or len(path) < 3:
+            return []
+        
+        time_params = self.time_of_day_factors.get(time_of_day, self.time_of_day_factors['morning'])
+        incidence, degrees, node_ids = self._get_road_tables()
+        
+        # Minutes from departure to each stop on the path
+        arrival = {0: 0}
+        elapsed = 0
+        steps = iter(route.get('path_details', {}).get('steps', []))
+        step = next(steps, None)
+        for i in range(1, len(path)):
+            if step and str(step['from']) == str(path[i - 1]) and str(step['to']) == str(path[i]):
+                elapsed += step['time']
+                step = next(steps, None)
+            arrival[i] = elapsed
+        
+        preemption_plan = []
+        for i in range(1, len(path) - 1):
+            intersection = node_ids.get(str(path[i]))
+            if intersection is None or degrees[intersection] <= 2:
+                continue
+            
+            current_plan = self._signal_plan(intersection, incidence[intersection], time_of_day, time_params)
+            coming_from = node_ids.get(str(path[i - 1]))
+            modified_phases, found_approach = self._preempt_phases(current_plan, coming_from)
+            if not found_approach:
+                continue
+            
+            arrival_seconds = arrival[i] * 60
+            preemption_plan.append({
+                'intersection': intersection,
+                'intersection_name': current_plan['intersection_name'],
+                'original_plan': current_plan,
+                'modified_plan': {
+                    **current_plan,
+                    'signal_phases': modified_phases
+                },
+                'emergency_approach': coming_from,
+                'emergency_approach_name': self.data.get_location_name(coming_from),
+                'exit_towards': node_ids.get(str(path[i + 1]), path[i + 1]),
+                'arrival_time': arrival[i],  # minutes, like route times
+                # Seconds after departure during which the signal is held
+                'preemption_window': {
+                    'start': max(0, arrival_seconds - self.preemption_lead),
+                    'end': arrival_seconds + self.preemption_clearance
+                },
+                'time_saved': self._estimate_time_saved(current_plan, modified_phases, coming_from)
+            })
+        
+        return preemption_plan
+    
+    def _preempt_phases(self, plan, coming_from):
+        """Give the emergency approach most of the cycle and cut the others"""
+        modified_phases = []
+        found_approach = False
+        
+        for phase in plan['signal_phases']:
+            if phase['approach'] == coming_from:
+                # Give this approach maximum green time
+                modified_phases.append({
+                    **phase,
+                    'green_time': plan['cycle_time'] * 0.7,  # 70% of cycle
+                    'emergency_priority': True
+                })
+                found_approach = True
+            else:
+                # Reduce other phases
+                modified_phases.append({
+                    **phase,
+                    'green_time': phase['green_time'] * 0.3  # Reduce to 30%
+                })
+        
+        return modified_phases, found_approach
+    
     def _find_intersections_between(self, start, end):
         # Find all intersections between two locations along the direct road
         intersections = set()
+        incidence, degrees, _ = self._get_road_tables()
         
         # Check if there's a direct road
-        direct_road = next((r for r in self.data.existing_roads 
+        direct_road = next((r for r in incidence.get(start, [])
                           if (r['from'] == start and r['to'] == end) or 
                              (r['from'] == end and r['to'] == start)), None)
         
@@ -195,10 +366,10 @@ class TrafficSignalOptimizer:
         
         # If no direct road, find path through intersections
         visited = set()
-        queue = [start]
+        queue = deque([start])
         
         while queue:
-            current = queue.pop(0)
+            current = queue.popleft()
             if current == end:
                 break
                 
@@ -207,18 +378,11 @@ class TrafficSignalOptimizer:
                 
             visited.add(current)
             
-            # Get all connected roads
-            connected_roads = [r for r in self.data.existing_roads 
-                             if r['from'] == current or r['to'] == current]
-            
-            for road in connected_roads:
+            for road in incidence.get(current, []):
                 neighbor = road['to'] if road['from'] == current else road['from']
                 
                 # Count connections to identify intersections
-                connections = [r for r in self.data.existing_roads 
-                              if r['from'] == neighbor or r['to'] == neighbor]
-                
-                if len(connections) > 2:  # More than just incoming and outgoing
+                if degrees.get(neighbor, 0) > 2:  # More than just incoming and outgoing
                     intersections.add(neighbor)
                 
                 if neighbor not in visited:
@@ -0,0 +1,84 @@
+import heapq
+import random
+
+
+class LandmarkHeuristic:
+    """ALT (A*, Landmarks, Triangle inequality) lower bounds for a road graph.
+
+    Shortest-path distances from a few landmarks are precomputed once per
+    weighted graph. For any node n and target t the triangle inequality gives
+    |d(L, t) - d(L, n)| <= d(n, t), so the largest such difference over all
+    landmarks is an admissible and consistent A* heuristic, also on any
+    subgraph obtained by closing roads.
+    """
+
+    strategies = ('farthest', 'random')
+
+    def __init__(self, graph, count=4, strategy='farthest', seed=0):
+        if strategy not in self.strategies:
+            raise ValueError(f"Unknown landmark strategy '{strategy}'")
+
+        self.strategy = strategy
+        self.landmarks = []
+        self.distances = []  # one {node: distance} table per landmark
+
+        nodes = sorted(graph)
+        count = min(count, len(nodes))
+        if strategy == 'random':
+            for landmark in random.Random(seed).sample(nodes, count):
+                self._add_landmark(graph, landmark)
+        else:
+            self._select_farthest(graph, nodes, count)
+
+    def _select_farthest(self, graph, nodes, count):
+        """Greedily add the node farthest from all landmarks chosen so far"""
+        if not count:
+            return
+
+        # Start from the node farthest from an arbitrary one, i.e. the periphery
+        seed_distances = self._dijkstra(graph, nodes[0])
+        first = max(nodes, key=lambda n: seed_distances.get(n, float('inf')))
+        self._add_landmark(graph, first)
+
+        nearest = dict(self.distances[0])
+        while len(self.landmarks) < count:
+            # Unreachable nodes count as infinitely far, so every connected
+            # component ends up with a landmark
+            candidates = [n for n in nodes if n not in self.landmarks]
+            landmark = max(candidates, key=lambda n: nearest.get(n, float('inf')))
+            self._add_landmark(graph, landmark)
+            for node, dist in self.distances[-1].items():
+                if dist < nearest.get(node, float('inf')):
+                    nearest[node] = dist
+
+    def _add_landmark(self, graph, landmark):
+        self.landmarks.append(landmark)
+        self.distances.append(self._dijkstra(graph, landmark))
+
+    @staticmethod
+    def _dijkstra(graph, source):
+        distances = {source: 0}
+        heap = [(0, source)]
+        while heap:
+            dist, current = heapq.heappop(heap)
+            if dist > distances[current]:
+                continue
+            for neighbor, edge in graph[current].items():
+                new_dist = dist + edge['weight']
+                if new_dist < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_dist
+                    heapq.heappush(heap, (new_dist, neighbor))
+        return distances
+
+    def estimate(self, node, target):
+        """Lower bound on the travel weight from node to target"""
+        best = 0
+        for table in self.distances:
+            to_node = table.get(node)
+            to_target = table.get(target)
+            if to_node is None or to_target is None:
+                continue
+            bound = abs(to_target - to_node)
+            if bound > best:
+                best = bound
+        return best
@@ -1,134 +1,508 @@
+import heapq
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
 class MSTOptimizer:
     def __init__(self, cairo_data):
         self.data = cairo_data
+        self.design_speed = 30  # km/h used to turn road length into travel time
+        self.unreachable_minutes = 240  # travel time charged for disconnected pairs
+        self._incremental = None  # state kept by start_incremental
+        # Serializes edits to the shared forest; re-entrant so callers can
+        # hold it around a check-and-edit sequence
+        self.incremental_lock = threading.RLock()
+        self.critical_facilities = ['F1', 'F2', 'F9', 'F10']  # Airport, Railway, Hospitals
+        self.weighting = {
+            'population_scale': 500000,  # population that doubles a road's priority
+            'condition_divisor': 5,  # higher values soften the condition penalty
+            'capacity_scale': 2000,  # capacity benefit of potential roads
+            'distance_scale': 10  # km per unit of distance penalty on potential roads
+        }
     
-    def optimize_network(self, use_prim=True, prioritize_population=True):
+    def optimize_network(self, use_prim=True, prioritize_population=True, steiner=False, terminals=None):
         # Prepare graph data with proper weights for new roads
         graph = self._prepare_graph(prioritize_population)
         
+        if steiner:
+            # Connect only the terminals (default: critical facilities)
+            ids = {str(n['id']): n['id'] for n in graph['nodes']}
+            terminals = [ids.get(str(t), t) for t in (terminals or self.critical_facilities)]
+            return self._steiner_tree(graph, terminals)
+        
         if use_prim:
             return self._prim_mst(graph)
         else:
             return self._kruskal_mst(graph)
     
+    def sweep_scenarios(self, grid, max_workers=None):
+        """Run optimize_network over every combination of parameters in grid.
+
+        grid maps parameter names to lists of values: use_prim,
+        prioritize_population, critical_facilities (lists of IDs) and any key
+        of self.weighting. Scenarios that share graph weights share one
+        prepared graph, and batches are spread over a process pool.
+        Returns one summary row per scenario in grid order.
+        """
+        allowed = ['use_prim', 'prioritize_population', 'critical_facilities'] + list(self.weighting)
+        unknown = [k for k in grid if k not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown scenario parameters: {', '.join(unknown)}")
+        
+        ids = {str(loc['id']): loc['id'] for loc in self.data.neighborhoods + self.data.facilities}
+        for key, values in grid.items():
+            for value in values:
+                if key in ('use_prim', 'prioritize_population'):
+                    if not isinstance(value, bool):
+                        raise ValueError(f"{key} values must be true or false")
+                elif key == 'critical_facilities':
+                    if not isinstance(value, list):
+                        raise ValueError("critical_facilities values must be lists of location IDs")
+                    unknown = [str(f) for f in value if str(f) not in ids]
+                    if unknown:
+                        raise ValueError(f"Unknown critical facilities: {', '.join(unknown)}")
+                elif not self._is_number(value) or value <= 0:
+                    raise ValueError(f"{key} values must be positive numbers")
+        
+        if max_workers is not None and (not isinstance(max_workers, int) or isinstance(max_workers, bool)
+                                        or max_workers < 1):
+            raise ValueError("max_workers must be a positive integer")
+        
+        keys = [k for k in allowed if k in grid]
+        scenarios = [dict(zip(keys, values)) for values in product(*(grid[k] for k in keys))]
+        
+        workers = max_workers or os.cpu_count() or 1
+        
+        # Group scenarios by the parameters that change edge weights
+        groups = {}
+        for index, scenario in enumerate(scenarios):
+            weighting = {k: scenario.get(k, v) for k, v in self.weighting.items()}
+            group_key = (scenario.get('prioritize_population', True), tuple(weighting.values()))
+            critical = [ids.get(str(f), f) for f in scenario.get('critical_facilities', self.critical_facilities)]
+            groups.setdefault(group_key, (weighting, []))[1].append(
+                (index, scenario.get('use_prim', True), critical)
+            )
+        
+        batches = []
+        for (prioritize_population, _), (weighting, members) in groups.items():
+            planner = MSTOptimizer(self.data)
+            planner.weighting = weighting
+            graph = planner._prepare_graph(prioritize_population)
+            size = -(-len(members) // workers)  # ceil division
+            for i in range(0, len(members), size):
+                batches.append((graph, members[i:i + size]))
+        
+        if workers == 1 or len(batches) == 1:
+            results = [_run_scenario_batch(graph, members) for graph, members in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_run_scenario_batch, *zip(*batches)))
+        
+        rows = dict(row for batch in results for row in batch)
+        return [{**scenarios[i], **rows[i]} for i in range(len(scenarios))]
+    
+    def design_network(self, budget):
+        """Choose potential roads that best cut travel time within a budget.
+
+        Travel demand between two neighborhoods is proportional to the product
+        of their populations. Candidates are ranked by benefit per unit cost
+        with lazy greedy selection: a stale benefit is only re-evaluated when
+        the candidate reaches the top of the heap, and each evaluation is an
+        incremental update of the current distance matrix rather than a new
+        shortest-path computation.
+        """
+        origins = [str(n['id']) for n in self.data.neighborhoods]
+        populations = [n.get('population', 0) for n in self.data.neighborhoods]
+        total_population = sum(populations) or 1
+        
+        candidates = [
+            (str(r['from']), str(r['to']), self._road_minutes(r), r)
+            for r in self.data.potential_roads
+        ]
+        
+        # Distances are only needed between origins and candidate endpoints
+        key_nodes = list(dict.fromkeys(origins + [c[0] for c in candidates] + [c[1] for c in candidates]))
+        dist = self._key_node_distances(key_nodes)
+        
+        pairs = [
+            (origins[i], origins[j], populations[i] * populations[j] / total_population)
+            for i in range(len(origins)) for j in range(i + 1, len(origins))
+        ]
+        
+        def weighted_time():
+            return sum(w * min(dist[a][b], self.unreachable_minutes) for a, b, w in pairs)
+        
+        def benefit(a, b, minutes):
+            dist_a = dist[a]
+            dist_b = dist[b]
+            gain = 0
+            for i, j, w in pairs:
+                current = min(dist[i][j], self.unreachable_minutes)
+                via = minutes + min(dist_a[i] + dist_b[j], dist_b[i] + dist_a[j])
+                if via < current:
+                    gain += w * (current - via)
+            return gain
+        
+        baseline = weighted_time()
+        remaining = budget
+        selected = []
+        
+        # Lazy greedy heap of (-benefit per cost, candidate index, round evaluated)
+        heap = []
+        for idx, (a, b, minutes, road) in enumerate(candidates):
+            if road['cost'] <= budget:
+                gain = benefit(a, b, minutes)
+                if gain > 0:
+                    heap.append((-gain / max(road['cost'], 1e-9), idx, 0))
+        heapq.heapify(heap)
+        
+        while heap:
+            _, idx, evaluated = heapq.heappop(heap)
+            a, b, minutes, road = candidates[idx]
+            if road['cost'] > remaining:
+                continue
+            
+            if evaluated != len(selected):
+                gain = benefit(a, b, minutes)
+                if gain > 0:
+                    heapq.heappush(heap, (-gain / max(road['cost'], 1e-9), idx, len(selected)))
+                continue
+            
+            gain = benefit(a, b, minutes)
+            self._insert_edge(dist, key_nodes, a, b, minutes)
+            remaining -= road['cost']
+            selected.append({
+                'from': road['from'],
+                'to': road['to'],
+                'distance': road['distance'],
+                'capacity': road['capacity'],
+                'cost': road['cost'],
+                'benefit': gain,
+                'benefit_per_cost': gain / road['cost'] if road['cost'] else gain
+            })
+        
+        final = weighted_time()
+        
+        return {
+            'selected_roads': selected,
+            'budget': budget,
+            'total_cost': budget - remaining,
+            'remaining_budget': remaining,
+            'baseline_weighted_time': baseline,
+            'final_weighted_time': final,
+            'improvement_percentage': (baseline - final) / baseline * 100 if baseline > 0 else 0
+        }
+    
+    def _road_minutes(self, road):
+        return road['distance'] / self.design_speed * 60
+    
+    def _key_node_distances(self, key_nodes):
+        """Travel minutes over existing roads between every pair of key nodes"""
+        adjacency = {}
+        for road in self.data.existing_roads:
+            a, b = str(road['from']), str(road['to'])
+            minutes = self._road_minutes(road)
+            adjacency.setdefault(a, []).append((b, minutes))
+            adjacency.setdefault(b, []).append((a, minutes))
+        
+        key_set = set(key_nodes)
+        dist = {}
+        for source in key_nodes:
+            distances = {source: 0}
+            heap = [(0, source)]
+            while heap:
+                d, node = heapq.heappop(heap)
+                if d > distances[node]:
+                    continue
+                for neighbor, minutes in adjacency.get(node, []):
+                    if d + minutes < distances.get(neighbor, float('inf')):
+                        distances[neighbor] = d + minutes
+                        heapq.heappush(heap, (d + minutes, neighbor))
+            dist[source] = {k: distances.get(k, float('inf')) for k in key_set}
+        return dist
+    
+    def _insert_edge(self, dist, key_nodes, a, b, minutes):
+        """Update the key-node distance matrix after adding road a-b.
+
+        A new shortest path uses the road at most once, so
+        d'(x, y) = min(d(x, y), d(x, a) + w + d(b, y), d(x, b) + w + d(a, y)).
+        """
+        dist_a = dict(dist[a])
+        dist_b = dict(dist[b])
+        for x in key_nodes:
+            row = dist[x]
+            to_a = row[a]
+            to_b = row[b]
+            for y in key_nodes:
+                via = minutes + min(to_a + dist_b[y], to_b + dist_a[y])
+                if via < row[y]:
+                    row[y] = via
+    
+    def start_incremental(self, prioritize_population=True):
+        """Build the in-memory spanning forest that road edits are applied to"""
+        graph = self._prepare_graph(prioritize_population)
+        state = IncrementalMST.from_edges(
+            [node['id'] for node in graph['nodes']],
+            [(graph['edge_from'][i], graph['edge_to'][i], graph['edge_weight'][i], self._edge_record(graph, i))
+             for i in range(len(graph['edge_weight']))]
+        )
+        
+        with self.incremental_lock:
+            self._incremental = {
+                'graph': graph,
+                'state': state,
+                'prioritize_population': prioritize_population,
+                'version': self.data.version,
+                'ids': {str(n['id']): n['id'] for n in graph['nodes']}
+            }
+            return self.incremental_result()
+    
+    def has_incremental(self, prioritize_population=True):
+        """Whether a forest for these settings exists and matches the data"""
+        inc = self._incremental
+        return bool(inc) and inc['version'] == self.data.version and \
+            inc['prioritize_population'] == prioritize_population
+    
+    def add_road(self, road, existing=True):
+        """Add an existing or potential road to the incremental forest"""
+        required = ['distance', 'capacity', 'condition' if existing else 'cost']
+        for field in required:
+            if not self._is_number(road.get(field)) or road[field] <= 0:
+                raise ValueError(f"Road {field} must be a positive number")
+        
+        with self.incremental_lock:
+            inc = self._incremental
+            road = {**road, 'from': self._node_id(road['from']), 'to': self._node_id(road['to'])}
+            weight = self._road_weight(inc['graph']['node_index'], road, existing, inc['prioritize_population'])
+            record = {
+                'from': road['from'],
+                'to': road['to'],
+                'weight': weight,
+                'existing': existing,
+                'distance': road['distance'],
+                'capacity': road['capacity']
+            }
+            if existing:
+                record['condition'] = road['condition']
+            else:
+                record['cost'] = road['cost']
+            inc['state'].add_edge(road['from'], road['to'], weight, record)
+            return self.incremental_result()
+    
+    def close_road(self, from_id, to_id):
+        """Remove every road between two locations from the incremental forest"""
+        with self.incremental_lock:
+            state = self._incremental['state']
+            for eid in self._find_roads(state, from_id, to_id):
+                state.remove_edge(eid)
+            return self.incremental_result()
+    
+    def reweight_road(self, from_id, to_id, weight):
+        """Change the planning weight of every road between two locations"""
+        if not self._is_number(weight):
+            raise ValueError("Road weight must be a number")
+        
+        with self.incremental_lock:
+            state = self._incremental['state']
+            for eid in self._find_roads(state, from_id, to_id):
+                state.update_weight(eid, weight)
+                state.edges[eid]['record']['weight'] = weight
+            return self.incremental_result()
+    
+    def _find_roads(self, state, from_id, to_id):
+        edges = state.find_edges(self._node_id(from_id), self._node_id(to_id))
+        if not edges:
+            raise ValueError(f"No road between {from_id} and {to_id}")
+        return edges
+    
+    def incremental_result(self):
+        with self.incremental_lock:
+            inc = self._incremental
+            mst_edges = [e['record'] for e in inc['state'].tree_edges()]
+            mst_nodes = set([e['from'] for e in mst_edges] + [e['to'] for e in mst_edges])
+            return self._summarize(inc['graph']['nodes'], mst_nodes, mst_edges)
+    
+    @staticmethod
+    def _is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+    
+    def _node_id(self, location_id):
+        ids = self._incremental['ids']
+        if str(location_id) not in ids:
+            raise ValueError(f"Unknown location {location_id}")
+        return ids[str(location_id)]
+    
     def _prepare_graph(self, prioritize_population):
-        graph = {'nodes': [], 'edges': []}
+        """Build nodes plus an array-backed edge list.
+
+        Edge i is described by edge_from[i], edge_to[i], edge_weight[i],
+        edge_existing[i] and the source road edge_road[i]; full edge dicts
+        are only created for the edges that end up in the result.
+        """
+        graph = {
+            'nodes': [],
+            'node_index': {},
+            'edge_from': [],
+            'edge_to': [],
+            'edge_weight': [],
+            'edge_existing': [],
+            'edge_road': []
+        }
         
         # Add all locations as nodes
         for loc in self.data.neighborhoods + self.data.facilities:
-            graph['nodes'].append({
+            node = {
                 'id': loc['id'],
                 'name': loc.get('name', ''),
                 'population': loc.get('population', 0),
                 'type': loc.get('type', ''),
                 'x': loc['x'],
                 'y': loc['y']
-            })
+            }
+            graph['nodes'].append(node)
+            graph['node_index'].setdefault(loc['id'], node)
         
         # Add existing roads with weights based on condition and capacity
         for road in self.data.existing_roads:
-            from_node = next(n for n in graph['nodes'] if n['id'] == road['from'])
-            to_node = next(n for n in graph['nodes'] if n['id'] == road['to'])
-            
+            weight = self._road_weight(graph['node_index'], road, True, prioritize_population)
+            self._add_edge(graph, road, weight, True)
+        
+        # Add potential roads with weights considering construction cost and benefit
+        for road in self.data.potential_roads:
+            weight = self._road_weight(graph['node_index'], road, False, prioritize_population)
+            self._add_edge(graph, road, weight, False)
+        
+        return graph
+    
+    def _road_weight(self, node_index, road, existing, prioritize_population):
+        from_node = node_index[road['from']]
+        to_node = node_index[road['to']]
+        w = self.weighting
+        
+        if existing:
             # Weight calculation gives preference to better roads
-            weight = road['distance'] * (1 + (10 - road['condition'])/5)  # More significant condition impact
+            weight = road['distance'] * (1 + (10 - road['condition'])/w['condition_divisor'])  # More significant condition impact
             
             if prioritize_population:
-                pop_factor = (from_node['population'] + to_node['population']) / 500000  # Adjusted scaling
+                pop_factor = (from_node['population'] + to_node['population']) / w['population_scale']  # Adjusted scaling
                 weight = weight / (1 + pop_factor)
-            
-            graph['edges'].append({
-                'from': road['from'],
-                'to': road['to'],
-                'weight': weight,
-                'existing': True,
-                'distance': road['distance'],
-                'capacity': road['capacity'],
-                'condition': road['condition']
-            })
+            return weight
         
-        # Add potential roads with weights considering construction cost and benefit
-        for road in self.data.potential_roads:
-            from_node = next(n for n in graph['nodes'] if n['id'] == road['from'])
-            to_node = next(n for n in graph['nodes'] if n['id'] == road['to'])
-            
-            # Calculate benefit factors
-            pop_benefit = (from_node['population'] + to_node['population']) / 500000
-            capacity_benefit = road['capacity'] / 2000
-            distance_penalty = road['distance'] / 10
-            
-            # Weight calculation that balances cost and benefit
-            weight = road['cost'] * (1 - pop_benefit) * (1 - capacity_benefit) * (1 + distance_penalty)
-            
-            graph['edges'].append({
-                'from': road['from'],
-                'to': road['to'],
-                'weight': weight,
-                'existing': False,
-                'distance': road['distance'],
-                'capacity': road['capacity'],
-                'cost': road['cost']
-            })
+        # Calculate benefit factors
+        pop_benefit = (from_node['population'] + to_node['population']) / w['population_scale']
+        capacity_benefit = road['capacity'] / w['capacity_scale']
+        distance_penalty = road['distance'] / w['distance_scale']
         
-        return graph
+        # Weight calculation that balances cost and benefit
+        return road['cost'] * (1 - pop_benefit) * (1 - capacity_benefit) * (1 + distance_penalty)
+    
+    def _add_edge(self, graph, road, weight, existing):
+        graph['edge_from'].append(road['from'])
+        graph['edge_to'].append(road['to'])
+        graph['edge_weight'].append(weight)
+        graph['edge_existing'].append(existing)
+        graph['edge_road'].append(road)
+    
+    def _edge_record(self, graph, i):
+        """Materialize edge i in the dict form returned by the API"""
+        road = graph['edge_road'][i]
+        edge = {
+            'from': graph['edge_from'][i],
+            'to': graph['edge_to'][i],
+            'weight': graph['edge_weight'][i],
+            'existing': graph['edge_existing'][i],
+            'distance': road['distance'],
+            'capacity': road['capacity']
+        }
+        if graph['edge_existing'][i]:
+            edge['condition'] = road['condition']
+        else:
+            edge['cost'] = road['cost']
+        return edge
+    
+    def _cheapest_edge_at(self, graph, node_id):
+        """Index of the lowest-weight edge touching a node, or None"""
+        edge_from = graph['edge_from']
+        edge_to = graph['edge_to']
+        edge_weight = graph['edge_weight']
+        best = None
+        for i in range(len(edge_weight)):
+            if (edge_from[i] == node_id or edge_to[i] == node_id) and (
+                    best is None or edge_weight[i] < edge_weight[best]):
+                best = i
+        return best
+    
+    def _summarize(self, nodes, mst_nodes, mst_edges):
+        return {
+            'nodes': [n for n in nodes if n['id'] in mst_nodes],
+            'edges': mst_edges,
+            'total_distance': sum(e['distance'] for e in mst_edges),
+            'total_cost': sum(e.get('cost', 0) for e in mst_edges if not e['existing']),
+            'critical_facilities_connected': self._check_critical_facilities(mst_edges)
+        }
     
     def _prim_mst(self, graph):
         nodes = graph['nodes']
-        edges = graph['edges']
+        edge_from = graph['edge_from']
+        edge_to = graph['edge_to']
+        edge_weight = graph['edge_weight']
         
         if not nodes:
             return {'nodes': [], 'edges': []}
         
-        mst_nodes = [nodes[0]['id']]
+        # Adjacency of edge indices so each node only looks at its own roads
+        adjacency = {n['id']: [] for n in nodes}
+        for i in range(len(edge_weight)):
+            adjacency.setdefault(edge_from[i], []).append(i)
+            adjacency.setdefault(edge_to[i], []).append(i)
+        
+        start = nodes[0]['id']
+        mst_nodes = {start}
         mst_edges = []
         
-        while len(mst_nodes) < len(nodes):
-            candidate_edges = [
-                e for e in edges 
-                if (e['from'] in mst_nodes and e['to'] not in mst_nodes) or 
-                   (e['to'] in mst_nodes and e['from'] not in mst_nodes)
-            ]
+        # Heap of (weight, edge index) for edges leaving the tree; the index
+        # breaks ties in favour of the earlier edge like a linear min() would
+        heap = [(edge_weight[i], i) for i in adjacency[start]]
+        heapq.heapify(heap)
+        
+        while heap and len(mst_nodes) < len(nodes):
+            _, i = heapq.heappop(heap)
             
-            if not candidate_edges:
-                break  # Disconnected graph
+            if edge_from[i] in mst_nodes and edge_to[i] in mst_nodes:
+                continue  # Both ends joined since this edge was pushed
                 
-            min_edge = min(candidate_edges, key=lambda x: x['weight'])
-            mst_edges.append(min_edge)
+            mst_edges.append(self._edge_record(graph, i))
+            new_node = edge_to[i] if edge_from[i] in mst_nodes else edge_from[i]
+            mst_nodes.add(new_node)
             
-            if min_edge['from'] not in mst_nodes:
-                mst_nodes.append(min_edge['from'])
-            else:
-                mst_nodes.append(min_edge['to'])
+            for j in adjacency[new_node]:
+                other = edge_to[j] if edge_from[j] == new_node else edge_from[j]
+                if other not in mst_nodes:
+                    heapq.heappush(heap, (edge_weight[j], j))
         
         # Ensure critical facilities are connected
-        critical_facilities = ['F1', 'F2', 'F9', 'F10']
         connected_critical = self._check_critical_facilities(mst_edges)
         
         if not connected_critical:
             # Add minimum connections to critical facilities
-            for facility in critical_facilities:
+            for facility in self.critical_facilities:
                 if facility not in mst_nodes:
                     # Find the cheapest connection to this facility
-                    facility_edges = [e for e in edges if e['from'] == facility or e['to'] == facility]
-                    if facility_edges:
-                        min_facility_edge = min(facility_edges, key=lambda x: x['weight'])
-                        mst_edges.append(min_facility_edge)
-                        if min_facility_edge['from'] not in mst_nodes:
-                            mst_nodes.append(min_facility_edge['from'])
-                        if min_facility_edge['to'] not in mst_nodes:
-                            mst_nodes.append(min_facility_edge['to'])
+                    i = self._cheapest_edge_at(graph, facility)
+                    if i is not None:
+                        mst_edges.append(self._edge_record(graph, i))
+                        mst_nodes.add(edge_from[i])
+                        mst_nodes.add(edge_to[i])
         
-        return {
-            'nodes': [n for n in nodes if n['id'] in mst_nodes],
-            'edges': mst_edges,
-            'total_distance': sum(e['distance'] for e in mst_edges),
-            'total_cost': sum(e.get('cost', 0) for e in mst_edges if not e['existing']),
-            'critical_facilities_connected': self._check_critical_facilities(mst_edges)
-        }
+        return self._summarize(nodes, mst_nodes, mst_edges)
     
     def _kruskal_mst(self, graph):
         nodes = graph['nodes']
-        edges = sorted(graph['edges'], key=lambda x: x['weight'])
+        edge_from = graph['edge_from']
+        edge_to = graph['edge_to']
+        edge_weight = graph['edge_weight']
+        order = sorted(range(len(edge_weight)), key=edge_weight.__getitem__)
         
         parent = {n['id']: n['id'] for n in nodes}
         
@@ -147,43 +521,443 @@ class MSTOptimizer:
             return True
         
         mst_edges = []
-        for edge in edges:
-            if union(edge['from'], edge['to']):
-                mst_edges.append(edge)
+        for i in order:
+            if union(edge_from[i], edge_to[i]):
+                mst_edges.append(self._edge_record(graph, i))
                 if len(mst_edges) == len(nodes) - 1:
                     break
         
         # Ensure critical facilities are connected
-        critical_facilities = ['F1', 'F2', 'F9', 'F10']
         connected_critical = self._check_critical_facilities(mst_edges)
         
         if not connected_critical:
             # Add minimum connections to critical facilities
-            for facility in critical_facilities:
+            for facility in self.critical_facilities:
                 if find(facility) != find(nodes[0]['id']):
                     # Find the cheapest connection to this facility
-                    facility_edges = [e for e in edges if e['from'] == facility or e['to'] == facility]
-                    if facility_edges:
-                        min_facility_edge = min(facility_edges, key=lambda x: x['weight'])
-                        if union(min_facility_edge['from'], min_facility_edge['to']):
-                            mst_edges.append(min_facility_edge)
+                    i = self._cheapest_edge_at(graph, facility)
+                    if i is not None and union(edge_from[i], edge_to[i]):
+                        mst_edges.append(self._edge_record(graph, i))
         
-        mst_nodes = list(set([e['from'] for e in mst_edges] + [e['to'] for e in mst_edges]))
+        mst_nodes = set([e['from'] for e in mst_edges] + [e['to'] for e in mst_edges])
         
-        return {
-            'nodes': [n for n in nodes if n['id'] in mst_nodes],
-            'edges': mst_edges,
-            'total_distance': sum(e['distance'] for e in mst_edges),
-            'total_cost': sum(e.get('cost', 0) for e in mst_edges if not e['existing']),
-            'critical_facilities_connected': self._check_critical_facilities(mst_edges)
-        }
+        return self._summarize(nodes, mst_nodes, mst_edges)
+    
+    def _steiner_tree(self, graph, terminals):
+        """Mehlhorn's 2-approximation of the minimum Steiner tree.
+
+        One multi-source Dijkstra from all terminals assigns every node to
+        its nearest terminal. Each edge joining two such regions gives a
+        candidate terminal-to-terminal distance; the MST of those distances
+        is expanded back into road paths, and the result is reduced to a
+        spanning tree with non-terminal leaves pruned.
+        """
+        edge_from = graph['edge_from']
+        edge_to = graph['edge_to']
+        # Potential roads can have negative weights (benefit outweighs cost);
+        # shortest paths need non-negative lengths, so those count as free
+        edge_weight = [max(w, 0) for w in graph['edge_weight']]
+        terminals = list(dict.fromkeys(terminals))
+        unknown = [t for t in terminals if t not in graph['node_index']]
+        if unknown:
+            raise ValueError(f"Unknown terminal IDs: {', '.join(map(str, unknown))}")
+        
+        adjacency = {n['id']: [] for n in graph['nodes']}
+        for i in range(len(edge_weight)):
+            adjacency[edge_from[i]].append(i)
+            adjacency[edge_to[i]].append(i)
+        
+        # Voronoi regions: nearest terminal, distance and the edge leading back to it
+        base = {t: t for t in terminals}
+        dist = {t: 0 for t in terminals}
+        via = {}
+        # Entries carry str(node) so ties never compare int and str IDs
+        heap = [(0, str(t), t) for t in terminals]
+        heapq.heapify(heap)
+        while heap:
+            d, _, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            for i in adjacency[node]:
+                other = edge_to[i] if edge_from[i] == node else edge_from[i]
+                if d + edge_weight[i] < dist.get(other, float('inf')):
+                    dist[other] = d + edge_weight[i]
+                    base[other] = base[node]
+                    via[other] = i
+                    heapq.heappush(heap, (dist[other], str(other), other))
+        
+        # Shortest bridging edge between every pair of adjacent regions
+        bridges = {}
+        for i in range(len(edge_weight)):
+            u, v = edge_from[i], edge_to[i]
+            if u not in base or v not in base or base[u] == base[v]:
+                continue
+            pair = tuple(sorted((base[u], base[v]), key=str))
+            length = dist[u] + edge_weight[i] + dist[v]
+            if pair not in bridges or length < bridges[pair][0]:
+                bridges[pair] = (length, i)
+        
+        # MST over terminals, then expand each bridge into its road path
+        parent = {t: t for t in terminals}
+        
+        def find(u):
+            while parent[u] != u:
+                parent[u] = parent[parent[u]]
+                u = parent[u]
+            return u
+        
+        chosen = set()
+        for (a, b), (_, i) in sorted(bridges.items(), key=lambda kv: kv[1]):
+            root_a, root_b = find(a), find(b)
+            if root_a == root_b:
+                continue
+            parent[root_b] = root_a
+            chosen.add(i)
+            for node in (edge_from[i], edge_to[i]):
+                while node in via:
+                    chosen.add(via[node])
+                    node = edge_to[via[node]] if edge_from[via[node]] == node else edge_from[via[node]]
+        
+        # The expanded paths may share roads or form cycles: keep an MST of
+        # them and drop non-terminal leaves
+        parent = {}
+        tree = []
+        for i in sorted(chosen, key=lambda i: (edge_weight[i], i)):
+            for node in (edge_from[i], edge_to[i]):
+                parent.setdefault(node, node)
+            root_u, root_v = find(edge_from[i]), find(edge_to[i])
+            if root_u != root_v:
+                parent[root_v] = root_u
+                tree.append(i)
+        
+        terminal_set = set(terminals)
+        degree = {}
+        for i in tree:
+            degree[edge_from[i]] = degree.get(edge_from[i], 0) + 1
+            degree[edge_to[i]] = degree.get(edge_to[i], 0) + 1
+        pruned = True
+        while pruned:
+            pruned = False
+            for i in list(tree):
+                leaf = next((n for n in (edge_from[i], edge_to[i])
+                             if degree[n] == 1 and n not in terminal_set), None)
+                if leaf is not None:
+                    tree.remove(i)
+                    degree[edge_from[i]] -= 1
+                    degree[edge_to[i]] -= 1
+                    pruned = True
+        
+        mst_edges = [self._edge_record(graph, i) for i in tree]
+        mst_nodes = set([e['from'] for e in mst_edges] + [e['to'] for e in mst_edges])
+        result = self._summarize(graph['nodes'], mst_nodes, mst_edges)
+        result['terminals'] = terminals
+        result['terminals_connected'] = len(terminals) < 2 or (
+            all(t in mst_nodes for t in terminals) and len({find(t) for t in terminals}) == 1
+        )
+        return result
     
     def _check_critical_facilities(self, edges):
-        critical_facilities = ['F1', 'F2', 'F9', 'F10']  # Airport, Railway, Hospitals
         connected_nodes = set()
         
         for edge in edges:
             connected_nodes.add(edge['from'])
             connected_nodes.add(edge['to'])
         
-        return all(f in connected_nodes for f in critical_facilities)
\ No newline at end of file
+        return all(f in connected_nodes for f in self.critical_facilities)
+
+def _run_scenario_batch(graph, members):
+    """Process-pool worker: run MSTs for (index, use_prim, critical) tuples"""
+    optimizer = MSTOptimizer(None)
+    rows = []
+    for index, use_prim, critical in members:
+        optimizer.critical_facilities = critical
+        result = optimizer._prim_mst(graph) if use_prim else optimizer._kruskal_mst(graph)
+        rows.append((index, {
+            'total_distance': result.get('total_distance', 0),
+            'total_cost': result.get('total_cost', 0),
+            'critical_facilities_connected': result.get('critical_facilities_connected', False),
+            'edges': len(result['edges'])
+        }))
+    return rows
+
+
+class IncrementalMST:
+    """Minimum spanning forest kept up to date under single-edge changes.
+
+    The forest is stored as rooted trees with parent pointers and depths.
+    Depths are only meaningful relative to other nodes of the same tree,
+    so a cut never has to renumber either half. Inserting an edge walks the
+    tree path between its endpoints and swaps out the heaviest edge on it
+    if the new one is lighter (cycle property). Removing a tree edge walks
+    both halves in lockstep until the smaller one is exhausted and looks
+    for the lightest replacement among that half's non-tree edges; linking
+    re-roots the smaller tree. Each change costs about the tree path length
+    plus the smaller affected component instead of a full recomputation.
+    """
+
+    def __init__(self):
+        self.edges = {}  # edge id -> {'from', 'to', 'weight', 'record'}
+        self.in_tree = set()
+        self.tree_adj = {}  # node -> {neighbor: edge id}
+        self.nontree_adj = {}  # node -> set of edge ids
+        self.parent = {}  # node -> (parent node, edge id), None for roots
+        self.depth = {}
+        self.size = {}  # root -> number of nodes in its tree
+        self.pair_index = {}  # (u, v) sorted by str -> set of edge ids
+        self._next_id = 0
+
+    @classmethod
+    def from_edges(cls, nodes, edges):
+        """Build the forest for (u, v, weight, record) edges with one Kruskal pass"""
+        mst = cls()
+        for node in nodes:
+            mst.add_node(node)
+        for u, v, weight, record in edges:
+            mst.add_node(u)
+            mst.add_node(v)
+            eid = mst._next_id
+            mst._next_id += 1
+            mst.edges[eid] = {'from': u, 'to': v, 'weight': weight, 'record': record}
+            mst.pair_index.setdefault(mst._pair(u, v), set()).add(eid)
+
+        # Same (weight, id) order as _key, so later edits see a consistent forest
+        union = {node: node for node in mst.parent}
+
+        def find(u):
+            while union[u] != u:
+                union[u] = union[union[u]]
+                u = union[u]
+            return u
+
+        for eid in sorted(mst.edges, key=mst._key):
+            edge = mst.edges[eid]
+            u, v = edge['from'], edge['to']
+            root_u, root_v = find(u), find(v)
+            if root_u == root_v:
+                mst.nontree_adj[u].add(eid)
+                mst.nontree_adj[v].add(eid)
+            else:
+                union[root_u] = root_v
+                mst.in_tree.add(eid)
+                mst.tree_adj[u][v] = eid
+                mst.tree_adj[v][u] = eid
+
+        # Root every tree at its first node and set parents, depths and sizes
+        for root in list(mst.parent):
+            if root in mst.size and mst.size[root] == 1 and mst.tree_adj[root]:
+                tree = mst._subtree(root)
+                for node in tree[1:]:
+                    del mst.size[node]
+                mst.size[root] = len(tree)
+                for node in tree:
+                    for neighbor, eid in mst.tree_adj[node].items():
+                        if neighbor != root and mst.parent[neighbor] is None:
+                            mst.parent[neighbor] = (node, eid)
+                            mst.depth[neighbor] = mst.depth[node] + 1
+        return mst
+
+    def add_node(self, node):
+        if node not in self.parent:
+            self.parent[node] = None
+            self.depth[node] = 0
+            self.size[node] = 1
+            self.tree_adj[node] = {}
+            self.nontree_adj[node] = set()
+
+    def add_edge(self, u, v, weight, record=None):
+        """Add an edge and update the forest; returns the new edge id"""
+        self.add_node(u)
+        self.add_node(v)
+        eid = self._next_id
+        self._next_id += 1
+        self.edges[eid] = {'from': u, 'to': v, 'weight': weight, 'record': record}
+        self.pair_index.setdefault(self._pair(u, v), set()).add(eid)
+        self._insert(eid)
+        return eid
+
+    def remove_edge(self, eid):
+        edge = self.edges.pop(eid)
+        self.pair_index[self._pair(edge['from'], edge['to'])].discard(eid)
+        if eid not in self.in_tree:
+            self.nontree_adj[edge['from']].discard(eid)
+            self.nontree_adj[edge['to']].discard(eid)
+            return
+
+        side = self._cut(eid, edge)
+        replacement = self._find_replacement(side)
+        if replacement is not None:
+            self.nontree_adj[self.edges[replacement]['from']].discard(replacement)
+            self.nontree_adj[self.edges[replacement]['to']].discard(replacement)
+            self._link(replacement)
+
+    def update_weight(self, eid, weight):
+        edge = self.edges[eid]
+        old_weight = edge['weight']
+        tree_edge = eid in self.in_tree
+        if weight == old_weight or (tree_edge and weight < old_weight) or (not tree_edge and weight > old_weight):
+            # Lighter tree edges and heavier non-tree edges keep the forest minimal
+            edge['weight'] = weight
+            return
+
+        self.remove_edge(eid)
+        edge['weight'] = weight
+        self.edges[eid] = edge
+        self.pair_index[self._pair(edge['from'], edge['to'])].add(eid)
+        self._insert(eid)
+
+    def find_edges(self, u, v):
+        return sorted(self.pair_index.get(self._pair(u, v), ()))
+
+    def tree_edges(self):
+        return [self.edges[eid] for eid in sorted(self.in_tree)]
+
+    @staticmethod
+    def _pair(u, v):
+        return (u, v) if str(u) <= str(v) else (v, u)
+
+    def _key(self, eid):
+        return (self.edges[eid]['weight'], eid)
+
+    def _insert(self, eid):
+        edge = self.edges[eid]
+        u, v = edge['from'], edge['to']
+        if u == v:
+            self.nontree_adj[u].add(eid)
+            return
+
+        path = self._tree_path(u, v)
+        if path is None:
+            self._link(eid)
+            return
+
+        heaviest = max(path, key=self._key)
+        if self._key(eid) < self._key(heaviest):
+            heavy_edge = self.edges[heaviest]
+            self._cut(heaviest, heavy_edge)
+            self.nontree_adj[heavy_edge['from']].add(heaviest)
+            self.nontree_adj[heavy_edge['to']].add(heaviest)
+            self._link(eid)
+        else:
+            self.nontree_adj[u].add(eid)
+            self.nontree_adj[v].add(eid)
+
+    def _tree_path(self, u, v):
+        """Edge ids on the tree path between u and v, or None if not connected"""
+        up_u, up_v = [], []
+        # Depths of different trees are not comparable, so any root
+        # reached before the paths meet means u and v are not connected
+        while self.depth[u] > self.depth[v]:
+            if self.parent[u] is None:
+                return None
+            node, eid = self.parent[u]
+            up_u.append(eid)
+            u = node
+        while self.depth[v] > self.depth[u]:
+            if self.parent[v] is None:
+                return None
+            node, eid = self.parent[v]
+            up_v.append(eid)
+            v = node
+        while u != v:
+            if self.parent[u] is None or self.parent[v] is None:
+                return None
+            node, eid = self.parent[u]
+            up_u.append(eid)
+            u = node
+            node, eid = self.parent[v]
+            up_v.append(eid)
+            v = node
+        return up_u + up_v
+
+    def _root(self, node):
+        while self.parent[node] is not None:
+            node = self.parent[node][0]
+        return node
+
+    def _link(self, eid):
+        """Join two trees with edge eid, re-rooting the smaller one"""
+        edge = self.edges[eid]
+        u, v = edge['from'], edge['to']
+        root_u, root_v = self._root(u), self._root(v)
+        if self.size[root_u] > self.size[root_v]:
+            u, v = v, u
+            root_u, root_v = root_v, root_u
+
+        self.size[root_v] += self.size.pop(root_u)
+        self.tree_adj[u][v] = eid
+        self.tree_adj[v][u] = eid
+        self.in_tree.add(eid)
+
+        # Hang u's tree below v, resetting parents and depths from u outwards
+        self.parent[u] = (v, eid)
+        self.depth[u] = self.depth[v] + 1
+        stack = [u]
+        while stack:
+            node = stack.pop()
+            for neighbor, tree_eid in self.tree_adj[node].items():
+                if tree_eid == self.parent[node][1]:
+                    continue
+                self.parent[neighbor] = (node, tree_eid)
+                self.depth[neighbor] = self.depth[node] + 1
+                stack.append(neighbor)
+
+    def _cut(self, eid, edge):
+        """Remove tree edge eid; returns the nodes of the smaller half"""
+        u, v = edge['from'], edge['to']
+        child = u if self.parent[u] is not None and self.parent[u][1] == eid else v
+        parent = v if child == u else u
+
+        del self.tree_adj[u][v]
+        del self.tree_adj[v][u]
+        self.in_tree.discard(eid)
+
+        # child becomes the root of its half; its depths stay as they are
+        self.parent[child] = None
+        root = self._root(parent)
+        total = self.size.pop(root)
+        child_side, side = self._smaller_side(child, parent)
+        self.size[child] = len(side) if child_side else total - len(side)
+        self.size[root] = total - self.size[child]
+        return side
+
+    def _smaller_side(self, a, b):
+        """Walk the trees of a and b in lockstep; returns (is a's, nodes) of the smaller"""
+        sides = ([a], [b])
+        seen = ({a}, {b})
+        position = [0, 0]
+        while True:
+            for i in (0, 1):
+                nodes = sides[i]
+                if position[i] == len(nodes):
+                    return i == 0, nodes
+                node = nodes[position[i]]
+                position[i] += 1
+                for neighbor in self.tree_adj[node]:
+                    if neighbor not in seen[i]:
+                        seen[i].add(neighbor)
+                        nodes.append(neighbor)
+
+    def _subtree(self, root):
+        nodes = [root]
+        seen = {root}
+        for node in nodes:
+            for neighbor in self.tree_adj[node]:
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    nodes.append(neighbor)
+        return nodes
+
+    def _find_replacement(self, side):
+        """Lightest non-tree edge reconnecting the two halves of a cut tree"""
+        # Scan the smaller half; non-tree edges never leave their original
+        # component, so any edge leaving that half reaches the other one
+        side = set(side)
+        
+        best = None
+        for node in side:
+            for eid in self.nontree_adj[node]:
+                e = self.edges[eid]
+                other = e['to'] if e['from'] == node else e['from']
+                if other not in side and (best is None or self._key(eid) < self._key(best)):
+                    best = eid
+        return best
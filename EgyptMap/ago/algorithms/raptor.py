@@ -0,0 +1,132 @@
+from bisect import bisect_left
+
+class RaptorPlanner:
+    """Round-based public transit routing (RAPTOR) over timetabled routes.
+
+    Each route is a fixed stop sequence served by trips that all take the
+    same segment times, so trips stay in departure order at every stop and
+    the earliest catchable trip is a binary search. Round k scans only the
+    routes through stops improved in round k - 1 and finds the earliest
+    arrival everywhere using at most k vehicles.
+    """
+
+    def __init__(self, routes, transfer_time=3):
+        """routes: dicts with 'id', 'mode', 'stops', 'segment_times' (minutes)
+        and 'departures' (minutes after midnight from the first stop)"""
+        self.transfer_time = transfer_time
+        self.routes = []
+        self.stop_routes = {}  # stop -> [(route index, position on route)]
+
+        for route in routes:
+            stops = [str(s) for s in route['stops']]
+            # Rounded to a hundredth of a minute to keep float noise out of results
+            offsets = [0]
+            for minutes in route['segment_times']:
+                offsets.append(round(offsets[-1] + minutes, 2))
+            departures = sorted(route['departures'])
+
+            index = len(self.routes)
+            self.routes.append({
+                **route,
+                'stops': stops,
+                # times[i][trip]: when trip reaches stop i
+                'times': [[round(d + offset, 2) for d in departures] for offset in offsets]
+            })
+            for position, stop in enumerate(stops):
+                self.stop_routes.setdefault(stop, []).append((index, position))
+
+    def query(self, origin, destination, departure, max_transfers=3):
+        """Earliest-arrival journeys from origin leaving at departure (minutes).
+
+        Returns one journey per number of vehicles that improves the arrival
+        time, i.e. the Pareto set of arrival time against transfers, fewest
+        transfers first. Empty if the destination cannot be reached.
+        """
+        origin = str(origin)
+        destination = str(destination)
+        if origin not in self.stop_routes or destination not in self.stop_routes:
+            return []
+
+        best = {origin: departure}
+        labels = [{origin: departure}]  # labels[k][stop]: arrival with k vehicles
+        parents = [{}]  # parents[k][stop]: (route, trip, board position, alight position)
+        marked = {origin}
+
+        for k in range(1, max_transfers + 2):
+            labels.append({})
+            parents.append({})
+
+            # Earliest marked position on every route through a marked stop
+            queue = {}
+            for stop in marked:
+                for route, position in self.stop_routes.get(stop, []):
+                    if position < queue.get(route, len(self.routes[route]['stops'])):
+                        queue[route] = position
+            marked = set()
+
+            for route_index, start in queue.items():
+                route = self.routes[route_index]
+                times = route['times']
+                trip = None
+                board = None
+
+                for position in range(start, len(route['stops'])):
+                    stop = route['stops'][position]
+
+                    if trip is not None:
+                        arrival = times[position][trip]
+                        # Local and target pruning
+                        if arrival < min(best.get(stop, float('inf')), best.get(destination, float('inf'))):
+                            labels[k][stop] = arrival
+                            best[stop] = arrival
+                            parents[k][stop] = (route_index, trip, board, position)
+                            marked.add(stop)
+
+                    previous = labels[k - 1].get(stop)
+                    if previous is None:
+                        continue
+                    ready = previous + (self.transfer_time if k > 1 else 0)
+                    if trip is not None and ready > times[position][trip]:
+                        continue
+                    earlier = bisect_left(times[position], ready)
+                    if earlier < len(times[position]) and (trip is None or earlier < trip):
+                        trip = earlier
+                        board = position
+
+            if not marked:
+                break
+
+        journeys = []
+        for k in range(1, len(labels)):
+            if destination in labels[k]:
+                journeys.append(self._journey(labels, parents, k, destination, departure))
+        return journeys
+
+    def _journey(self, labels, parents, rounds, destination, departure):
+        """Walk the round-k parent pointers back to the origin"""
+        legs = []
+        stop = destination
+        for k in range(rounds, 0, -1):
+            route_index, trip, board, alight = parents[k][stop]
+            route = self.routes[route_index]
+            legs.append({
+                'mode': route['mode'],
+                'route': route['id'],
+                'towards': route['stops'][-1],
+                'from': route['stops'][board],
+                'to': route['stops'][alight],
+                'stops': route['stops'][board:alight + 1],
+                'departure': route['times'][board][trip],
+                'arrival': route['times'][alight][trip]
+            })
+            stop = route['stops'][board]
+        legs.reverse()
+
+        arrival = labels[rounds][destination]
+        return {
+            'departure': departure,
+            'arrival': arrival,
+            'duration': arrival - departure,
+            'transfers': rounds - 1,
+            'legs': legs
+        }
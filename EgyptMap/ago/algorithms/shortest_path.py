@@ -1,8 +1,24 @@
 import heapq
-import math
+import os
 from collections import defaultdict
 
+from algorithms.contraction import ContractionHierarchy
+from algorithms.landmarks import LandmarkHeuristic
+
 class ShortestPathFinder:
+    # Weighted graphs shared by every finder instance, keyed by
+    # (time_of_day, emergency). Entries of these caches come from
+    # CairoData.cache_entry, so stale ones are rebuilt on data changes.
+    _graph_cache = {}
+    # Optional Contraction Hierarchies, same keys, filled by build_hierarchies
+    # or load_hierarchies. Routing falls back to plain search without them.
+    _hierarchy_cache = {}
+    # ALT landmark distance tables for the A* heuristic, same invalidation
+    _landmark_cache = {}
+    # Multi-source shortest-path trees rooted at every facility of a type,
+    # keyed by (time_of_day, emergency, facility_type)
+    _facility_tree_cache = {}
+
     def __init__(self, cairo_data):
         self.data = cairo_data
         self.traffic_multipliers = {
@@ -12,36 +28,215 @@ class ShortestPathFinder:
             'night': 0.8    # 9 PM-6 AM
         }
         self.congestion_threshold = 0.8  # Threshold to consider road congested
+        self.landmark_count = 4  # Landmarks for the A* heuristic
+        self.landmark_strategy = 'farthest'  # or 'random'
         
-    def find_shortest_path(self, start, end, time_of_day='morning', avoid_roads=None):
+    def find_shortest_path(self, start, end, time_of_day='morning', avoid_roads=None, bidirectional=False):
+        """Find the fastest regular route.
+
+        bidirectional=True always runs bidirectional Dijkstra, bypassing any
+        contraction hierarchy, so the two plain searches can be compared.
+        """
+        if bidirectional:
+            return self._bidirectional_search(start, end, time_of_day, avoid_roads)
         return self._find_path(start, end, time_of_day, emergency=False, avoid_roads=avoid_roads)
     
     def emergency_route(self, start, end, time_of_day='morning'):
         return self._find_path(start, end, time_of_day, emergency=True)
     
-    def find_alternate_routes(self, start, end, time_of_day='morning', closed_roads=None, count=3):
-        """Find multiple alternate routes using Yen's algorithm"""
-        routes = []
-        avoid_roads = closed_roads or []
-        
-        # Get primary route
-        primary_route = self._find_path(start, end, time_of_day, emergency=False, avoid_roads=avoid_roads)
-        if primary_route.get('error'):
-            return primary_route
-        
-        routes.append(primary_route)
-        
-        # Find alternate routes by temporarily removing road segments
-        for i in range(count - 1):
-            # Get the most congested segment from the current best route
-            if len(primary_route['path']) > 2:
-                congested_segment = self._find_most_congested_segment(primary_route['path_details']['steps'])
-                avoid_roads.append(f"{congested_segment['from']}-{congested_segment['to']}")
+    def nearest_facility(self, start, facility_type='Medical', time_of_day='morning', emergency=True):
+        """Route to the fastest reachable facility of the given type.
+
+        Uses the precomputed facility tree when available, otherwise a single
+        Dijkstra from start that stops at the first facility it settles.
+        """
+        start = str(start)
+        key = (time_of_day, emergency, facility_type)
+        graph = self._prepare_graph(time_of_day, emergency)
+        if start not in graph:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'Invalid start location'}
+        
+        cached = self.data.cached(self._facility_tree_cache.get(key))
+        if cached is not None:
+            path = self._tree_path(cached, start)
+        else:
+            path = self._nearest_target_path(graph, start, self._facility_ids(facility_type))
+        
+        if not path:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': f'No reachable {facility_type} facility'}
+        
+        result = self._build_route(path, time_of_day, emergency)
+        result['facility'] = path[-1]
+        result['facility_name'] = self.data.get_location_name(path[-1])
+        return result
+    
+    def precompute_nearest_facilities(self, facility_type='Medical', time_of_day=None, emergency=True):
+        """Build the reverse shortest-path tree from every facility of a type.
+
+        Afterwards nearest_facility is a table lookup. Without time_of_day the
+        tree is built for every time of day.
+        """
+        times = [time_of_day] if time_of_day else list(self.traffic_multipliers)
+        sources = self._facility_ids(facility_type)
+        for t in times:
+            graph = self._prepare_graph(t, emergency)
+            tree = self._multi_source_tree(graph, sources)
+            self._facility_tree_cache[(t, emergency, facility_type)] = self.data.cache_entry(tree)
+    
+    def _facility_ids(self, facility_type):
+        return {str(f['id']) for f in self.data.facilities if facility_type in f.get('type', '')}
+    
+    def _nearest_target_path(self, graph, start, targets):
+        """Dijkstra from start that stops at the first settled target"""
+        heap = [(0, start)]
+        distances = {start: 0}
+        previous_nodes = {}
+        visited = set()
+        
+        while heap:
+            current_time, current_node = heapq.heappop(heap)
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+            
+            if current_node in targets:
+                return self._reconstruct_path(previous_nodes, current_node)
             
-            alt_route = self._find_path(start, end, time_of_day, emergency=False, avoid_roads=avoid_roads)
-            if not alt_route.get('error') and alt_route['path'] != primary_route['path']:
-                routes.append(alt_route)
-                primary_route = alt_route
+            for neighbor, edge_data in graph[current_node].items():
+                if neighbor in visited:
+                    continue
+                new_time = current_time + edge_data['weight']
+                if new_time < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_time
+                    previous_nodes[neighbor] = current_node
+                    heapq.heappush(heap, (new_time, neighbor))
+        
+        return []
+    
+    def _multi_source_tree(self, graph, sources):
+        """Map each reachable node to its next hop toward the nearest source.
+
+        Roads are symmetric, so a forward search from all sources at once
+        gives the reverse shortest-path tree. Sources map to None.
+        """
+        heap = [(0, source) for source in sources if source in graph]
+        heapq.heapify(heap)
+        distances = {source: 0 for _, source in heap}
+        next_hop = {source: None for _, source in heap}
+        visited = set()
+        
+        while heap:
+            current_time, current_node = heapq.heappop(heap)
+            if current_node in visited:
+                continue
+            visited.add(current_node)
+            
+            for neighbor, edge_data in graph[current_node].items():
+                if neighbor in visited:
+                    continue
+                new_time = current_time + edge_data['weight']
+                if new_time < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_time
+                    next_hop[neighbor] = current_node
+                    heapq.heappush(heap, (new_time, neighbor))
+        
+        return next_hop
+    
+    def _tree_path(self, next_hop, start):
+        if start not in next_hop:
+            return []
+        path = [start]
+        while next_hop[path[-1]] is not None:
+            path.append(next_hop[path[-1]])
+        return path
+    
+    def reachable_within(self, start, minutes, time_of_day='morning', emergency=False):
+        """Isochrones: everything reachable from start within each time limit.
+
+        minutes may be a single limit or a list of limits; one bounded
+        Dijkstra over the reported segment times serves all of them. Roads
+        that are only partly travelled before a limit are returned with the
+        fraction covered from their reached end.
+        """
+        graph = self._prepare_graph(time_of_day, emergency)
+        start = str(start)
+        thresholds = sorted(minutes if isinstance(minutes, (list, tuple)) else [minutes])
+        
+        if start not in graph:
+            return {'error': 'Invalid start location'}
+        
+        limit = thresholds[-1]
+        heap = [(0, start)]
+        arrival = {start: 0}
+        settled = {}
+        
+        while heap:
+            current_time, current_node = heapq.heappop(heap)
+            if current_node in settled:
+                continue
+            if current_time > limit:
+                break
+            settled[current_node] = current_time
+            
+            for neighbor, edge_data in graph[current_node].items():
+                if neighbor in settled:
+                    continue
+                new_time = current_time + edge_data['time']
+                if new_time < arrival.get(neighbor, float('inf')):
+                    arrival[neighbor] = new_time
+                    heapq.heappush(heap, (new_time, neighbor))
+        
+        isochrones = []
+        for threshold in thresholds:
+            locations = [
+                {'id': node, 'name': self.data.get_location_name(node), 'time': t}
+                for node, t in settled.items() if t <= threshold
+            ]
+            partial_edges = []
+            for node, t in settled.items():
+                if t > threshold:
+                    continue
+                for neighbor, edge_data in graph[node].items():
+                    if t + edge_data['time'] > threshold:
+                        partial_edges.append({
+                            'from': node,
+                            'to': neighbor,
+                            'fraction': (threshold - t) / edge_data['time']
+                        })
+            isochrones.append({
+                'minutes': threshold,
+                'locations': locations,
+                'partial_edges': partial_edges
+            })
+        
+        return {
+            'start': start,
+            'time_of_day': time_of_day,
+            'isochrones': isochrones
+        }
+    
+    def find_alternate_routes(self, start, end, time_of_day='morning', closed_roads=None, count=3, max_overlap=None):
+        """Find multiple alternate routes using Yen's algorithm.
+
+        Enumerates loopless routes in order of increasing travel weight on the
+        cached graph. If max_overlap is given (0-1), a route is only returned
+        when at most that fraction of its roads is shared with each route
+        already returned.
+        """
+        graph = self._prepare_graph(time_of_day, False)
+        blocked = self._blocked_edges(closed_roads)
+        
+        start = str(start)
+        end = str(end)
+        
+        if start not in graph or end not in graph:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'Invalid start or end location'}
+        
+        paths = self._k_shortest_paths(graph, start, end, blocked, count, max_overlap)
+        if not paths:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'No path found'}
+        
+        routes = [self._build_route(path, time_of_day, False) for path in paths]
         
         return {
             'routes': routes,
@@ -50,9 +245,117 @@ class ShortestPathFinder:
             'congestion_reduction': self._calculate_congestion_reduction(routes)
         }
     
-    def _find_most_congested_segment(self, path_steps):
-        """Find the segment with highest congestion in a path"""
-        return max(path_steps, key=lambda x: x['congestion'])
+    def _k_shortest_paths(self, graph, start, end, blocked, count, max_overlap=None):
+        """Yen's K shortest loopless paths with Lawler's spur-node pruning"""
+        first = self._weighted_path(graph, start, end, blocked)
+        if first is None:
+            return []
+        
+        # Every path found so far, in order, with the index it deviated at.
+        # Spur searches only start at or after that index (Lawler), since
+        # earlier spur nodes were already explored from the parent path.
+        shortest = [(first[1], 0)]
+        accepted = [first[1]]
+        candidates = []
+        seen = {tuple(first[1])}
+        max_paths = count * 10  # bound the work when diversity rejects paths
+        
+        while len(accepted) < count and len(shortest) < max_paths:
+            previous, deviation = shortest[-1]
+            root_weight = sum(
+                graph[previous[j]][previous[j + 1]]['weight'] for j in range(deviation)
+            )
+            
+            for i in range(deviation, len(previous) - 1):
+                spur_node = previous[i]
+                root = previous[:i + 1]
+                
+                # Remove the next edge of every known path sharing this root
+                removed = set(blocked)
+                for path, _ in shortest:
+                    if len(path) > i + 1 and path[:i + 1] == root:
+                        removed.add((path[i], path[i + 1]))
+                        removed.add((path[i + 1], path[i]))
+                
+                spur = self._weighted_path(graph, spur_node, end, removed, set(root[:-1]))
+                if spur is not None:
+                    candidate = root[:-1] + spur[1]
+                    if tuple(candidate) not in seen:
+                        seen.add(tuple(candidate))
+                        heapq.heappush(candidates, (root_weight + spur[0], candidate, i))
+                
+                root_weight += graph[previous[i]][previous[i + 1]]['weight']
+            
+            if not candidates:
+                break
+            
+            _, path, deviation = heapq.heappop(candidates)
+            shortest.append((path, deviation))
+            if max_overlap is None or all(
+                self._path_overlap(path, other) <= max_overlap for other in accepted
+            ):
+                accepted.append(path)
+        
+        return accepted
+    
+    def _path_overlap(self, path, other):
+        """Fraction of path's roads that also appear in other"""
+        edges = {frozenset(pair) for pair in zip(path, path[1:])}
+        if not edges:
+            return 1.0
+        other_edges = {frozenset(pair) for pair in zip(other, other[1:])}
+        return len(edges & other_edges) / len(edges)
+    
+    def travel_time_matrix(self, origins, destinations, time_of_day='morning', emergency=False):
+        """Travel times in minutes from every origin to every destination.
+
+        Runs one Dijkstra per origin over the cached graph, stopping as soon
+        as all destinations are settled. times[i][j] is None when the
+        destination is unreachable.
+        """
+        graph = self._prepare_graph(time_of_day, emergency)
+        origins = [str(o) for o in origins]
+        destinations = [str(d) for d in destinations]
+        targets = set(d for d in destinations if d in graph)
+        
+        times = []
+        for origin in origins:
+            minutes = self._one_to_many_minutes(graph, origin, targets) if origin in graph else {}
+            times.append([minutes.get(d) for d in destinations])
+        
+        return {
+            'origins': origins,
+            'destinations': destinations,
+            'time_of_day': time_of_day,
+            'times': times
+        }
+    
+    def _one_to_many_minutes(self, graph, origin, targets):
+        """Reported minutes along the fastest route from origin to each target"""
+        heap = [(0, origin)]
+        distances = {origin: 0}
+        minutes = {origin: 0}
+        settled = {}
+        remaining = len(targets)
+        
+        while heap and remaining:
+            current_weight, current_node = heapq.heappop(heap)
+            if current_node in settled:
+                continue
+            settled[current_node] = minutes[current_node]
+            if current_node in targets:
+                remaining -= 1
+            
+            for neighbor, edge_data in graph[current_node].items():
+                if neighbor in settled:
+                    continue
+                new_weight = current_weight + edge_data['weight']
+                if new_weight < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = new_weight
+                    minutes[neighbor] = minutes[current_node] + edge_data['time']
+                    heapq.heappush(heap, (new_weight, neighbor))
+        
+        return {t: settled[t] for t in targets if t in settled}
     
     def _calculate_congestion_reduction(self, routes):
         """Calculate potential congestion reduction from alternate routes"""
@@ -68,6 +371,14 @@ class ShortestPathFinder:
         return max(0, reduction * 100)  # Return as percentage
     
     def _find_path(self, start, end, time_of_day, emergency=False, avoid_roads=None):
+        # Precomputed hierarchies only describe the unrestricted graph
+        if not avoid_roads:
+            hierarchy = self._get_hierarchy(time_of_day, emergency)
+            if hierarchy:
+                result = hierarchy.query(str(start), str(end))
+                if result:
+                    return self._build_route(result[1], time_of_day, emergency)
+        
         # Use Dijkstra's algorithm for standard routes, A* for emergency
         if emergency:
             return self._a_star_search(start, end, time_of_day, avoid_roads)
@@ -75,7 +386,8 @@ class ShortestPathFinder:
             return self._dijkstra_search(start, end, time_of_day, avoid_roads)
     
     def _dijkstra_search(self, start, end, time_of_day, avoid_roads=None):
-        graph = self._prepare_graph(time_of_day, False, avoid_roads or [])
+        graph = self._prepare_graph(time_of_day, False)
+        blocked = self._blocked_edges(avoid_roads)
         
         start = str(start)
         end = str(end)
@@ -83,17 +395,22 @@ class ShortestPathFinder:
         if start not in graph or end not in graph:
             return {'path': [], 'distance': 0, 'time': 0, 'error': 'Invalid start or end location'}
         
-        # Priority queue: (total_time, current_node, path)
-        heap = []
-        heapq.heappush(heap, (0, start, [start]))
+        result = self._weighted_path(graph, start, end, blocked)
+        if result is None:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'No path found'}
+        return self._build_route(result[1], time_of_day, False)
+    
+    def _weighted_path(self, graph, start, end, blocked=None, excluded_nodes=None):
+        """Plain Dijkstra returning (total_weight, path), or None if unreachable"""
+        # Priority queue: (total_time, current_node)
+        heap = [(0, start)]
         
         visited = set()
-        distances = {node: float('inf') for node in graph}
-        distances[start] = 0
-        previous_nodes = {node: None for node in graph}
+        distances = {start: 0}
+        previous_nodes = {}
         
         while heap:
-            current_time, current_node, path = heapq.heappop(heap)
+            current_time, current_node = heapq.heappop(heap)
             
             if current_node in visited:
                 continue
@@ -101,32 +418,86 @@ class ShortestPathFinder:
             visited.add(current_node)
             
             if current_node == end:
-                path_details = self._get_path_details(path, time_of_day, False)
-                total_distance = path_details['total_distance']
-                total_time = sum(step['time'] for step in path_details['steps']) if path_details['steps'] else 0
-                
-                return {
-                    'path': path,
-                    'distance': total_distance,
-                    'time': total_time,
-                    'path_details': path_details
-                }
+                return current_time, self._reconstruct_path(previous_nodes, current_node)
             
             for neighbor, edge_data in graph[current_node].items():
                 if neighbor in visited:
                     continue
+                if blocked and (current_node, neighbor) in blocked:
+                    continue
+                if excluded_nodes and neighbor in excluded_nodes:
+                    continue
                     
                 new_time = current_time + edge_data['weight']
                 
-                if new_time < distances[neighbor]:
+                if new_time < distances.get(neighbor, float('inf')):
                     distances[neighbor] = new_time
                     previous_nodes[neighbor] = current_node
-                    heapq.heappush(heap, (new_time, neighbor, path + [neighbor]))
+                    heapq.heappush(heap, (new_time, neighbor))
+        
+        return None
+    
+    def _bidirectional_search(self, start, end, time_of_day, avoid_roads=None):
+        """Dijkstra grown from both ends of the symmetric road graph"""
+        graph = self._prepare_graph(time_of_day, False)
+        blocked = self._blocked_edges(avoid_roads)
+        
+        start = str(start)
+        end = str(end)
+        
+        if start not in graph or end not in graph:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'Invalid start or end location'}
+        
+        # Index 0 is the forward search from start, 1 the backward one from end
+        distances = ({start: 0}, {end: 0})
+        previous_nodes = ({}, {})
+        heaps = ([(0, start)], [(0, end)])
+        visited = (set(), set())
+        best = 0 if start == end else float('inf')
+        meeting = start if start == end else None
+        
+        while heaps[0] and heaps[1]:
+            # Standard stopping rule: no unsettled pair can beat the best meeting
+            if heaps[0][0][0] + heaps[1][0][0] >= best:
+                break
+            
+            # Expand the side with the smaller frontier
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            current_time, current_node = heapq.heappop(heaps[side])
+            if current_node in visited[side]:
+                continue
+            visited[side].add(current_node)
+            
+            for neighbor, edge_data in graph[current_node].items():
+                if neighbor in visited[side]:
+                    continue
+                if blocked and (current_node, neighbor) in blocked:
+                    continue
+                
+                new_time = current_time + edge_data['weight']
+                if new_time < distances[side].get(neighbor, float('inf')):
+                    distances[side][neighbor] = new_time
+                    previous_nodes[side][neighbor] = current_node
+                    heapq.heappush(heaps[side], (new_time, neighbor))
+                
+                other_time = distances[1 - side].get(neighbor)
+                if other_time is not None and distances[side][neighbor] + other_time < best:
+                    best = distances[side][neighbor] + other_time
+                    meeting = neighbor
         
-        return {'path': [], 'distance': 0, 'time': 0, 'error': 'No path found'}
+        if meeting is None:
+            return {'path': [], 'distance': 0, 'time': 0, 'error': 'No path found'}
+        
+        path = self._reconstruct_path(previous_nodes[0], meeting)
+        node = meeting
+        while node in previous_nodes[1]:
+            node = previous_nodes[1][node]
+            path.append(node)
+        return self._build_route(path, time_of_day, False)
     
     def _a_star_search(self, start, end, time_of_day, avoid_roads=None):
-        graph = self._prepare_graph(time_of_day, True, avoid_roads or [])
+        graph = self._prepare_graph(time_of_day, True)
+        blocked = self._blocked_edges(avoid_roads)
         
         start = str(start)
         end = str(end)
@@ -134,58 +505,134 @@ class ShortestPathFinder:
         if start not in graph or end not in graph:
             return {'path': [], 'distance': 0, 'time': 0, 'error': 'Invalid start or end location'}
         
-        open_set = []
-        heapq.heappush(open_set, (0, start))
+        landmarks = self._get_landmarks(time_of_day, True)
         
+        open_set = [(landmarks.estimate(start, end), start)]
         came_from = {}
-        g_score = {node: float('inf') for node in graph}
-        g_score[start] = 0
-        
-        f_score = {node: float('inf') for node in graph}
-        f_score[start] = self._heuristic(start, end)
+        g_score = {start: 0}
+        closed = set()
         
         while open_set:
             _, current = heapq.heappop(open_set)
             
+            # The landmark heuristic is consistent, so a node popped once is final
+            if current in closed:
+                continue
+            closed.add(current)
+            
             if current == end:
                 path = self._reconstruct_path(came_from, current)
-                path_details = self._get_path_details(path, time_of_day, True)
-                total_distance = path_details['total_distance']
-                total_time = sum(step['time'] for step in path_details['steps']) if path_details['steps'] else 0
-                
-                return {
-                    'path': path,
-                    'distance': total_distance,
-                    'time': total_time,
-                    'path_details': path_details
-                }
+                return self._build_route(path, time_of_day, True)
                 
             for neighbor, edge_data in graph[current].items():
+                if neighbor in closed:
+                    continue
+                if blocked and (current, neighbor) in blocked:
+                    continue
                 tentative_g_score = g_score[current] + edge_data['weight']
                 
-                if tentative_g_score < g_score[neighbor]:
+                if tentative_g_score < g_score.get(neighbor, float('inf')):
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_g_score
-                    f_score[neighbor] = tentative_g_score + self._heuristic(neighbor, end)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+                    f_score = tentative_g_score + landmarks.estimate(neighbor, end)
+                    heapq.heappush(open_set, (f_score, neighbor))
         
         # Try again with relaxed constraints if no path found
         return self._dijkstra_search(start, end, time_of_day, avoid_roads)
     
-    def _heuristic(self, a, b):
-        """Euclidean distance heuristic for A* algorithm"""
-        node_a = self.data.get_neighborhood(a) or self.data.get_facility(a)
-        node_b = self.data.get_neighborhood(b) or self.data.get_facility(b)
-        
-        if node_a and node_b:
-            dx = node_a['x'] - node_b['x']
-            dy = node_a['y'] - node_b['y']
-            return math.sqrt(dx*dx + dy*dy) / 50  # Approximate km with scaling factor
-        return 0
+    def _build_route(self, path, time_of_day, emergency):
+        path_details = self._get_path_details(path, time_of_day, emergency)
+        total_distance = path_details['total_distance']
+        total_time = sum(step['time'] for step in path_details['steps']) if path_details['steps'] else 0
+        
+        return {
+            'path': path,
+            'distance': total_distance,
+            'time': total_time,
+            'path_details': path_details
+        }
+    
+    def build_hierarchies(self, directory=None):
+        """Contract the road graph for every time of day (offline preprocessing).
+
+        Hierarchies are kept in memory for later queries and, if a directory
+        is given, saved there so the server can load them at startup.
+        """
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        for time_of_day in self.traffic_multipliers:
+            for emergency in (False, True):
+                graph = self._prepare_graph(time_of_day, emergency)
+                hierarchy = ContractionHierarchy.from_graph(graph)
+                self._hierarchy_cache[(time_of_day, emergency)] = self.data.cache_entry(hierarchy)
+                if directory:
+                    hierarchy.save(self._hierarchy_file(directory, time_of_day, emergency))
+    
+    def load_hierarchies(self, directory):
+        """Load saved hierarchies that still match the current road graph"""
+        loaded = 0
+        for time_of_day in self.traffic_multipliers:
+            for emergency in (False, True):
+                filename = self._hierarchy_file(directory, time_of_day, emergency)
+                if not os.path.exists(filename):
+                    continue
+                try:
+                    hierarchy = ContractionHierarchy.load(filename)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Error loading hierarchy {filename}: {e}")
+                    continue
+                
+                graph = self._prepare_graph(time_of_day, emergency)
+                if hierarchy.signature != ContractionHierarchy.graph_signature(graph):
+                    print(f"Skipping stale hierarchy {filename}")
+                    continue
+                
+                self._hierarchy_cache[(time_of_day, emergency)] = self.data.cache_entry(hierarchy)
+                loaded += 1
+        return loaded
+    
+    def _get_hierarchy(self, time_of_day, emergency):
+        return self.data.cached(self._hierarchy_cache.get((time_of_day, emergency)))
     
-    def _prepare_graph(self, time_of_day, emergency, avoid_roads=None):
+    def _hierarchy_file(self, directory, time_of_day, emergency):
+        mode = 'emergency' if emergency else 'regular'
+        return os.path.join(directory, f"{time_of_day}_{mode}.json")
+    
+    def _get_landmarks(self, time_of_day, emergency):
+        """Return cached ALT landmark tables for the weighted graph"""
+        key = (time_of_day, emergency, self.landmark_count, self.landmark_strategy)
+        cached = self.data.cached(self._landmark_cache.get(key))
+        if cached is not None:
+            return cached
+        
+        graph = self._prepare_graph(time_of_day, emergency)
+        landmarks = LandmarkHeuristic(graph, self.landmark_count, self.landmark_strategy)
+        self._landmark_cache[key] = self.data.cache_entry(landmarks)
+        return landmarks
+    
+    def _prepare_graph(self, time_of_day, emergency):
+        """Return the cached weighted graph, rebuilding it if the data changed"""
+        key = (time_of_day, emergency)
+        cached = self.data.cached(self._graph_cache.get(key))
+        if cached is not None:
+            return cached
+        
+        graph = self._build_graph(time_of_day, emergency)
+        self._graph_cache[key] = self.data.cache_entry(graph)
+        return graph
+    
+    def _blocked_edges(self, avoid_roads):
+        """Turn 'from-to' road IDs into a set of directed edges to skip"""
+        blocked = set()
+        for road_id in avoid_roads or []:
+            from_id, _, to_id = str(road_id).partition('-')
+            blocked.add((from_id, to_id))
+            blocked.add((to_id, from_id))
+        return blocked
+    
+    def _build_graph(self, time_of_day, emergency):
         graph = defaultdict(dict)
-        avoid_roads = avoid_roads or []
         
         # Add all nodes
         for loc in self.data.neighborhoods + self.data.facilities:
@@ -195,11 +642,6 @@ class ShortestPathFinder:
         for road in self.data.existing_roads:
             from_id = str(road['from'])
             to_id = str(road['to'])
-            road_id = f"{from_id}-{to_id}"
-            
-            if road_id in avoid_roads or f"{to_id}-{from_id}" in avoid_roads:
-                continue
-                
             traffic = self.data.get_road_traffic(from_id, to_id, time_of_day)
             capacity = road['capacity']
             congestion = min(traffic / capacity, 2.0)  # Cap congestion at 200%
@@ -228,9 +670,13 @@ class ShortestPathFinder:
             if congestion > self.congestion_threshold:
                 weight *= 1 + (congestion - self.congestion_threshold) * 2
             
+            # Minutes as reported in path details, for matrix-style results
+            minutes = self._segment_minutes(road, min(traffic / capacity, 2.0), emergency)
+            
             # Add edge in both directions
             graph[from_id][to_id] = {
                 'weight': weight,
+                'time': minutes,
                 'distance': road['distance'],
                 'traffic': traffic,
                 'capacity': capacity,
@@ -238,13 +684,14 @@ class ShortestPathFinder:
             }
             graph[to_id][from_id] = {
                 'weight': weight,
+                'time': minutes,
                 'distance': road['distance'],
                 'traffic': traffic,
                 'capacity': capacity,
                 'condition': road['condition']
             }
         
-        return graph
+        return dict(graph)
     
     def _reconstruct_path(self, came_from, current):
         path = [current]
@@ -254,6 +701,16 @@ class ShortestPathFinder:
         path.reverse()
         return path
     
+    def _segment_minutes(self, road, congestion, emergency):
+        """Travel time in minutes reported for one road segment"""
+        if emergency:
+            speed = 80 * max(0.4, 1 - (congestion * 0.3))  # 40-100% of speed
+        else:
+            speed = 30 * max(0.2, 1 - (congestion * 0.4))  # 20-100% of speed
+        
+        condition_factor = 1 + ((10 - road['condition']) * 0.05)
+        return (road['distance'] / speed) * condition_factor * 60
+    
     def _get_path_details(self, path, time_of_day, emergency=False):
         details = []
         total_distance = 0
@@ -274,14 +731,7 @@ class ShortestPathFinder:
             capacity = road['capacity']
             congestion = min(traffic / capacity, 2.0)  # Cap at 200% congestion
             
-            # Calculate time
-            if emergency:
-                speed = 80 * max(0.4, 1 - (congestion * 0.3))  # 40-100% of speed
-            else:
-                speed = 30 * max(0.2, 1 - (congestion * 0.4))  # 20-100% of speed
-            
-            condition_factor = 1 + ((10 - road['condition']) * 0.05)
-            time = (distance / speed) * condition_factor * 60  # in minutes
+            time = self._segment_minutes(road, congestion, emergency)
             
             details.append({
                 'from': from_id,
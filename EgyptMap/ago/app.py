@@ -1,9 +1,11 @@
+import os
 from flask import Flask, render_template, jsonify, request
 from data.cairo_data import CairoData
 from algorithms.shortest_path import ShortestPathFinder
 from algorithms.mst import MSTOptimizer
 from algorithms.dynamic_prog import PublicTransportOptimizer
 from algorithms.greedy import TrafficSignalOptimizer
+from algorithms.simulation import SignalSimulator
 
 app = Flask(__name__)
 
@@ -11,6 +13,23 @@ app = Flask(__name__)
 cairo_data = CairoData()
 cairo_data.load_data()
 
+# Shared so the cached weighted road graphs are reused across requests
+path_finder = ShortestPathFinder(cairo_data)
+
+# Route graphs are cached per time period, so only known periods are accepted
+TIME_PERIODS = tuple(path_finder.traffic_multipliers)
+
+# Use precomputed contraction hierarchies when they have been built
+HIERARCHY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'hierarchies')
+if os.path.isdir(HIERARCHY_DIR):
+    print(f"Loaded {path_finder.load_hierarchies(HIERARCHY_DIR)} contraction hierarchies")
+
+# Keeps the in-memory spanning forest used for what-if road edits
+network_optimizer = MSTOptimizer(cairo_data)
+
+# Nearest-hospital lookups for emergency routes without a chosen destination
+path_finder.precompute_nearest_facilities('Medical')
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -37,6 +56,8 @@ def find_shortest_path():
         start = data.get('start')
         end = data.get('end')
         time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
         
         # Validate inputs
         if not start or not end:
@@ -52,14 +73,79 @@ def find_shortest_path():
         if not cairo_data.location_exists(end):
             return jsonify({'error': f'End location ID {end} not found'}), 404
         
-        path_finder = ShortestPathFinder(cairo_data)
-        result = path_finder.find_shortest_path(str(start), str(end), time_of_day)
+        result = path_finder.find_shortest_path(
+            str(start), str(end), time_of_day,
+            bidirectional=data.get('bidirectional', False)
+        )
         
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Failed to calculate path: {str(e)}'}), 500
 
+@app.route('/api/travel_time_matrix', methods=['POST'])
+def travel_time_matrix():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+            
+        origins = data.get('origins')
+        destinations = data.get('destinations')
+        time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
+        
+        # Validate inputs
+        if not isinstance(origins, list) or not isinstance(destinations, list) or not origins or not destinations:
+            return jsonify({'error': 'origins and destinations must be non-empty lists'}), 400
+        
+        # Check if locations exist
+        for loc in origins + destinations:
+            if not cairo_data.location_exists(loc):
+                return jsonify({'error': f'Location ID {loc} not found'}), 404
+        
+        result = path_finder.travel_time_matrix(origins, destinations, time_of_day)
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to calculate travel time matrix: {str(e)}'}), 500
+
+@app.route('/api/isochrone', methods=['POST'])
+def isochrone():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+            
+        start = data.get('start')
+        minutes = data.get('minutes', [10, 20, 30])
+        time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
+        
+        # Validate inputs
+        if not start:
+            return jsonify({'error': 'Missing start location'}), 400
+        
+        thresholds = minutes if isinstance(minutes, list) else [minutes]
+        if not thresholds or not all(isinstance(m, (int, float)) and m > 0 for m in thresholds):
+            return jsonify({'error': 'minutes must be a positive number or list of numbers'}), 400
+        
+        if not cairo_data.location_exists(start):
+            return jsonify({'error': f'Start location ID {start} not found'}), 404
+        
+        result = path_finder.reachable_within(
+            str(start), thresholds, time_of_day,
+            emergency=data.get('emergency', False)
+        )
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to calculate isochrone: {str(e)}'}), 500
+
 @app.route('/api/optimize_network', methods=['POST'])
 def optimize_network():
     try:
@@ -68,15 +154,105 @@ def optimize_network():
             return jsonify({'error': 'No data provided'}), 400
             
         optimizer = MSTOptimizer(cairo_data)
+        
+        # With a construction budget, pick potential roads instead of a spanning tree
+        if data.get('budget') is not None:
+            budget = data['budget']
+            if not isinstance(budget, (int, float)) or budget < 0:
+                return jsonify({'error': 'budget must be a non-negative number'}), 400
+            return jsonify(optimizer.design_network(budget))
+        
+        terminals = data.get('terminals')
+        if terminals is not None:
+            if not isinstance(terminals, list):
+                return jsonify({'error': 'terminals must be a list of location IDs'}), 400
+            for loc in terminals:
+                if not cairo_data.location_exists(loc):
+                    return jsonify({'error': f'Location ID {loc} not found'}), 404
+        
         result = optimizer.optimize_network(
             use_prim=data.get('algorithm', 'prim') == 'prim',
-            prioritize_population=data.get('prioritize_population', True)
+            prioritize_population=data.get('prioritize_population', True),
+            steiner=data.get('algorithm') == 'steiner',
+            terminals=terminals
         )
         return jsonify(result)
         
     except Exception as e:
         return jsonify({'error': f'Network optimization failed: {str(e)}'}), 500
 
+@app.route('/api/network_scenarios', methods=['POST'])
+def sweep_network_scenarios():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+            
+        grid = data.get('grid')
+        if not isinstance(grid, dict) or not grid or not all(isinstance(v, list) and v for v in grid.values()):
+            return jsonify({'error': 'grid must map parameter names to non-empty lists'}), 400
+        
+        optimizer = MSTOptimizer(cairo_data)
+        try:
+            scenarios = optimizer.sweep_scenarios(grid, max_workers=data.get('max_workers'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({'scenarios': scenarios})
+        
+    except Exception as e:
+        return jsonify({'error': f'Scenario sweep failed: {str(e)}'}), 500
+
+@app.route('/api/network_update', methods=['POST'])
+def update_network():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+            
+        action = data.get('action')
+        road = data.get('road', {})
+        prioritize_population = data.get('prioritize_population', True)
+        
+        if action not in ('reset', 'add', 'close', 'reweight'):
+            return jsonify({'error': 'action must be one of reset, add, close, reweight'}), 400
+        
+        if action != 'reset':
+            if not isinstance(road, dict):
+                return jsonify({'error': 'road must be an object'}), 400
+            if not road.get('from') or not road.get('to'):
+                return jsonify({'error': 'Missing road from or to location'}), 400
+            for loc in (road['from'], road['to']):
+                if not cairo_data.location_exists(loc):
+                    return jsonify({'error': f'Location ID {loc} not found'}), 404
+        
+        if action == 'reweight':
+            weight = road.get('weight')
+            if not isinstance(weight, (int, float)) or isinstance(weight, bool) or weight != weight:
+                return jsonify({'error': 'Road weight must be a number'}), 400
+        
+        # Edits apply to the current forest; (re)build it when needed. The
+        # lock keeps concurrent requests from interleaving on the shared forest.
+        try:
+            with network_optimizer.incremental_lock:
+                if action == 'reset' or not network_optimizer.has_incremental(prioritize_population):
+                    result = network_optimizer.start_incremental(prioritize_population)
+                
+                if action == 'add':
+                    result = network_optimizer.add_road(road, existing=road.get('existing', True))
+                elif action == 'close':
+                    result = network_optimizer.close_road(road['from'], road['to'])
+                elif action == 'reweight':
+                    result = network_optimizer.reweight_road(road['from'], road['to'], road.get('weight'))
+        except ValueError as e:
+            # Closing or reweighting fails only when there is no such road
+            return jsonify({'error': str(e)}), 404 if action in ('close', 'reweight') else 400
+        
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({'error': f'Network update failed: {str(e)}'}), 500
+
 @app.route('/api/optimize_transport', methods=['POST'])
 def optimize_transport():
     try:
@@ -169,6 +345,52 @@ def optimize_transport():
             }
         }), 500
 
+@app.route('/api/transit_journey', methods=['POST'])
+def transit_journey():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        origin = data.get('origin')
+        destination = data.get('destination')
+        departure = data.get('departure', '08:00')
+        max_transfers = data.get('max_transfers', 3)
+        
+        # Validate inputs
+        if not origin or not destination:
+            return jsonify({'error': 'Missing origin or destination'}), 400
+        
+        if str(origin) == str(destination):
+            return jsonify({'error': 'Origin and destination cannot be the same'}), 400
+        
+        # Departure is "HH:MM" or minutes after midnight
+        if isinstance(departure, str):
+            hours, _, minutes = departure.partition(':')
+            if not (hours.isdigit() and minutes.isdigit()):
+                return jsonify({'error': 'departure must be "HH:MM" or minutes after midnight'}), 400
+            departure = int(hours) * 60 + int(minutes)
+        elif not isinstance(departure, (int, float)) or departure < 0:
+            return jsonify({'error': 'departure must be "HH:MM" or minutes after midnight'}), 400
+        
+        if not isinstance(max_transfers, int) or max_transfers < 0:
+            return jsonify({'error': 'max_transfers must be a non-negative integer'}), 400
+        
+        if not cairo_data.location_exists(origin):
+            return jsonify({'error': f'Origin location ID {origin} not found'}), 404
+        
+        if not cairo_data.location_exists(destination):
+            return jsonify({'error': f'Destination location ID {destination} not found'}), 404
+        
+        optimizer = PublicTransportOptimizer(cairo_data)
+        result = optimizer.plan_journey(origin, destination, departure, max_transfers)
+        if not result['journeys']:
+            result['error'] = 'No transit journey found'
+        
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'Failed to plan transit journey: {str(e)}'}), 500
+
 @app.route('/api/optimize_signals', methods=['POST'])
 def optimize_signals():
     try:
@@ -177,14 +399,57 @@ def optimize_signals():
             return jsonify({'error': 'No data provided'}), 400
             
         optimizer = TrafficSignalOptimizer(cairo_data)
-        result = optimizer.optimize_signals(
-            intersections=data.get('intersections', []),
-            time_of_day=data.get('time_of_day', 'morning')
-        )
+        if data.get('batch'):
+            time_of_day = data.get('time_of_day', 'morning')
+            if time_of_day not in TIME_PERIODS:
+                return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
+            
+            # City-wide re-timing, returned as columns rather than per-signal dicts
+            result = optimizer.optimize_signals_batch(
+                intersections=data.get('intersections'),
+                time_of_day=time_of_day
+            )
+        else:
+            result = optimizer.optimize_signals(
+                intersections=data.get('intersections', []),
+                time_of_day=data.get('time_of_day', 'morning')
+            )
         return jsonify(result)
     except Exception as e:
         return jsonify({'error': f'Signal optimization failed: {str(e)}'}), 500
 
+@app.route('/api/simulate_signals', methods=['POST'])
+def simulate_signals():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
+        
+        duration = data.get('duration', 3600)
+        if not isinstance(duration, (int, float)) or duration <= 0:
+            return jsonify({'error': 'duration must be a positive number of seconds'}), 400
+        
+        plans = TrafficSignalOptimizer(cairo_data).optimize_signals(
+            data.get('intersections', []), time_of_day
+        )
+        if not plans:
+            return jsonify({'error': 'No signalized intersections to simulate'}), 400
+        
+        simulator = SignalSimulator(cairo_data, seed=data.get('seed', 0))
+        result = {'optimized': simulator.simulate(plans, time_of_day, duration)}
+        if data.get('compare_fixed_time', True):
+            # Same vehicles through equal-split signals, as a baseline
+            fixed = [simulator.fixed_time_plan(plan) for plan in plans]
+            result['fixed_time'] = simulator.simulate(fixed, time_of_day, duration)
+        
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': f'Signal simulation failed: {str(e)}'}), 500
+
 @app.route('/api/emergency_route', methods=['POST'])
 def find_emergency_route():
     try:
@@ -195,28 +460,37 @@ def find_emergency_route():
         start = data.get('start')
         end = data.get('end')
         time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
         
         # Validate inputs
-        if not start or not end:
-            return jsonify({'error': 'Missing start or end location'}), 400
+        if not start:
+            return jsonify({'error': 'Missing start location'}), 400
         
-        if str(start) == str(end):
-            return jsonify({'error': 'Start and end locations cannot be the same'}), 400
-        
-        # Check if locations exist
         if not cairo_data.location_exists(start):
             return jsonify({'error': f'Start location ID {start} not found'}), 404
         
-        if not cairo_data.location_exists(end):
-            return jsonify({'error': f'End location ID {end} not found'}), 404
-        
-        # Verify end is a medical facility
-        end_facility = cairo_data.get_facility(end)
-        if not end_facility or 'Medical' not in end_facility['type']:
-            return jsonify({'error': 'Destination must be a medical facility'}), 400
+        if not end:
+            # No destination chosen: route to the fastest reachable hospital
+            result = path_finder.nearest_facility(str(start), 'Medical', time_of_day)
+        else:
+            if str(start) == str(end):
+                return jsonify({'error': 'Start and end locations cannot be the same'}), 400
+            
+            if not cairo_data.location_exists(end):
+                return jsonify({'error': f'End location ID {end} not found'}), 404
+            
+            # Verify end is a medical facility
+            end_facility = cairo_data.get_facility(end)
+            if not end_facility or 'Medical' not in end_facility['type']:
+                return jsonify({'error': 'Destination must be a medical facility'}), 400
+            
+            result = path_finder.emergency_route(str(start), str(end), time_of_day)
         
-        path_finder = ShortestPathFinder(cairo_data)
-        result = path_finder.emergency_route(str(start), str(end), time_of_day)
+        if data.get('preemption') and result.get('path'):
+            result['preemption_plan'] = TrafficSignalOptimizer(cairo_data).plan_corridor_preemption(
+                result, time_of_day
+            )
         
         # Validate path coordinates
         if result.get('path'):
@@ -242,6 +516,8 @@ def find_alternate_routes():
         start = data.get('start')
         end = data.get('end')
         time_of_day = data.get('time_of_day', 'morning')
+        if time_of_day not in TIME_PERIODS:
+            return jsonify({'error': f"time_of_day must be one of {', '.join(TIME_PERIODS)}"}), 400
         closed_roads = data.get('closed_roads', [])
         
         # Validate inputs
@@ -258,11 +534,21 @@ def find_alternate_routes():
         if not cairo_data.location_exists(end):
             return jsonify({'error': f'End location ID {end} not found'}), 404
         
-        path_finder = ShortestPathFinder(cairo_data)
+        count = data.get('count', 3)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            return jsonify({'error': 'count must be a positive integer'}), 400
+        
+        max_overlap = data.get('max_overlap')
+        if max_overlap is not None and (not isinstance(max_overlap, (int, float)) or isinstance(max_overlap, bool)
+                                        or not 0 <= max_overlap <= 1):
+            return jsonify({'error': 'max_overlap must be null or a number between 0 and 1'}), 400
+        
         result = path_finder.find_alternate_routes(
             str(start), str(end), 
             time_of_day=time_of_day,
-            closed_roads=closed_roads
+            closed_roads=closed_roads,
+            count=count,
+            max_overlap=max_overlap
         )
         
         return jsonify(result)
@@ -283,8 +569,6 @@ def analyze_traffic():
         if not location:
             return jsonify({'error': 'Location is required'}), 400
         
-        path_finder = ShortestPathFinder(cairo_data)
-        
         # Get all connected roads
         connected_roads = []
         for road in cairo_data.existing_roads:
@@ -8,6 +8,7 @@ class CairoData:
         self.metro_lines = []
         self.bus_routes = []
         self.transport_demand = []
+        self.version = 0
         self.load_data()
 
     def load_data(self):
@@ -15,6 +16,7 @@ class CairoData:
         self._load_locations()
         self._load_roads()
         self._load_transport()
+        self.rebuild_indexes()
         print("Data loaded successfully:")
         print(f"- {len(self.neighborhoods)} neighborhoods")
         print(f"- {len(self.facilities)} facilities")
@@ -209,17 +211,64 @@ class CairoData:
             {"from": 5, "to": "F12", "passengers": 9500}
         ]
 
+    def rebuild_indexes(self):
+        """Build hash indexes over the loaded data for O(1) lookups.
+
+        Must be called again after mutating any of the data lists; the
+        version counter lets cached structures elsewhere detect the change.
+        """
+        self._neighborhood_index = {}
+        for n in self.neighborhoods:
+            self._neighborhood_index.setdefault(str(n['id']), n)
+
+        self._facility_index = {}
+        for f in self.facilities:
+            self._facility_index.setdefault(str(f['id']), f)
+
+        # Roads are undirected, so key them by the sorted endpoint pair.
+        # setdefault keeps the first matching road, like the old linear scan.
+        self._road_index = {}
+        for r in self.existing_roads:
+            self._road_index.setdefault(self.pair_key(r['from'], r['to']), r)
+
+        # Traffic records are looked up in the stored direction first
+        self._traffic_index = {}
+        for r in self.traffic_patterns:
+            from_id, _, to_id = r['road'].partition('-')
+            self._traffic_index.setdefault((from_id, to_id), r)
+
+        self._metro_index = {}
+        for line in self.metro_lines:
+            self._metro_index.setdefault(line['id'], line)
+
+        self._bus_index = {}
+        for route in self.bus_routes:
+            self._bus_index.setdefault(route['id'], route)
+
+        self.version += 1
+
+    def cache_entry(self, value):
+        """Wrap a structure derived from this data for a version-checked cache"""
+        return (self, self.version, value)
+
+    def cached(self, entry):
+        """Value of a cache_entry still current for this data, else None"""
+        if entry and entry[0] is self and entry[1] == self.version:
+            return entry[2]
+        return None
+
+    @staticmethod
+    def pair_key(a, b):
+        """Normalized key for an unordered pair of location IDs"""
+        a = str(a)
+        b = str(b)
+        return (a, b) if a <= b else (b, a)
+
     def location_exists(self, location_id):
         """Check if a location exists in neighborhoods or facilities"""
         try:
             location_id = str(location_id)
-            # Check neighborhoods
-            if any(str(n['id']) == location_id for n in self.neighborhoods):
-                return True
-            # Check facilities
-            if any(f['id'] == location_id for f in self.facilities):
-                return True
-            return False
+            return location_id in self._neighborhood_index or location_id in self._facility_index
         except Exception as e:
             print(f"Error checking location existence: {e}")
             return False
@@ -227,8 +276,7 @@ class CairoData:
     def get_neighborhood(self, id):
         """Get neighborhood by ID"""
         try:
-            id = str(id)
-            return next((n for n in self.neighborhoods if str(n['id']) == id), None)
+            return self._neighborhood_index.get(str(id))
         except Exception as e:
             print(f"Error getting neighborhood {id}: {e}")
             return None
@@ -236,16 +284,19 @@ class CairoData:
     def get_facility(self, id):
         """Get facility by ID"""
         try:
-            id = str(id)
-            return next((f for f in self.facilities if f['id'] == id), None)
+            return self._facility_index.get(str(id))
         except Exception as e:
             print(f"Error getting facility {id}: {e}")
             return None
 
+    def get_location(self, id):
+        """Get neighborhood or facility by ID"""
+        return self.get_neighborhood(id) or self.get_facility(id)
+
     def get_location_name(self, id):
         """Get location name by ID"""
         try:
-            loc = self.get_neighborhood(id) or self.get_facility(id)
+            loc = self.get_location(id)
             return loc['name'] if loc else f"Unknown Location ({id})"
         except Exception as e:
             print(f"Error getting location name {id}: {e}")
@@ -257,12 +308,7 @@ class CairoData:
             from_id = str(from_id)
             to_id = str(to_id)
             
-            road_id = f"{from_id}-{to_id}"
-            road = next((r for r in self.traffic_patterns if r['road'] == road_id), None)
-            if not road:
-                road_id = f"{to_id}-{from_id}"
-                road = next((r for r in self.traffic_patterns if r['road'] == road_id), None)
-            
+            road = self._traffic_index.get((from_id, to_id)) or self._traffic_index.get((to_id, from_id))
             return road.get(time_of_day, 1000) if road else 1000
         except Exception as e:
             print(f"Error getting traffic for {from_id}-{to_id}: {e}")
@@ -271,20 +317,15 @@ class CairoData:
     def get_road_between(self, from_id, to_id):
         """Get road data between two locations"""
         try:
-            from_id = str(from_id)
-            to_id = str(to_id)
-            
-            road = next((r for r in self.existing_roads if 
-                        (str(r['from']) == from_id and str(r['to']) == to_id) or 
-                        (str(r['from']) == to_id and str(r['to']) == from_id)), None)
-            return road
+            return self._road_index.get(self.pair_key(from_id, to_id))
         except Exception as e:
             print(f"Error getting road between {from_id} and {to_id}: {e}")
             return None
+
     def get_metro_line(self, line_id):
         """Get metro line by ID"""
         try:
-            return next((line for line in self.metro_lines if line['id'] == line_id), None)
+            return self._metro_index.get(line_id)
         except Exception as e:
             print(f"Error getting metro line {line_id}: {e}")
             return None
@@ -292,7 +333,7 @@ class CairoData:
     def get_bus_route(self, route_id):
         """Get bus route by ID"""
         try:
-            return next((route for route in self.bus_routes if route['id'] == route_id), None)
+            return self._bus_index.get(route_id)
         except Exception as e:
             print(f"Error getting bus route {route_id}: {e}")
             return None